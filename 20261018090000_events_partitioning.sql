@@ -0,0 +1,48 @@
+-- Convert events into a monthly range-partitioned table with tenant/time composite indexes.
+-- Existing rows are copied into per-month partitions; old months can later be
+-- detached cheaply with: ALTER TABLE events DETACH PARTITION events_yYYYYmMM CONCURRENTLY;
+
+BEGIN;
+
+ALTER TABLE events RENAME TO events_unpartitioned;
+
+CREATE TABLE events (
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    event_type VARCHAR(50) NOT NULL,
+    description TEXT NOT NULL,
+    camera_id UUID NOT NULL REFERENCES cameras(id),
+    confidence DOUBLE PRECISION,
+    metadata JSON,
+    tenant_id UUID NOT NULL REFERENCES tenants(id),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- One partition per month from the oldest event up to three months ahead
+DO $$
+DECLARE
+    month_start DATE := date_trunc('month', COALESCE((SELECT min(created_at) FROM events_unpartitioned), now()))::date;
+    last_month DATE := (date_trunc('month', now()) + INTERVAL '3 months')::date;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)',
+            'events_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+INSERT INTO events (id, event_type, description, camera_id, confidence, metadata, tenant_id, created_at)
+SELECT id, event_type, description, camera_id, confidence, metadata, tenant_id, COALESCE(created_at, now())
+FROM events_unpartitioned;
+
+CREATE INDEX ix_events_tenant_id_created_at ON events (tenant_id, created_at DESC);
+CREATE INDEX ix_events_tenant_id_event_type_created_at ON events (tenant_id, event_type, created_at);
+CREATE INDEX ix_events_tenant_id_camera_id_created_at ON events (tenant_id, camera_id, created_at);
+
+DROP TABLE events_unpartitioned;
+
+COMMIT;
@@ -0,0 +1,8 @@
+-- Indexes backing keyset pagination on (created_at, id), newest first within a tenant.
+
+DROP INDEX IF EXISTS ix_events_tenant_id_created_at;
+CREATE INDEX ix_events_tenant_id_created_at ON events (tenant_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS ix_cameras_tenant_id_created_at_id ON cameras (tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_persons_tenant_id_created_at_id ON persons (tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_vehicles_tenant_id_created_at_id ON vehicles (tenant_id, created_at DESC, id DESC);
@@ -0,0 +1,12 @@
+-- Index-backed event search: generated tsvector column with GIN index for
+-- ranked full-text matches, plus a pg_trgm GIN index for ILIKE substring matches.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(event_type, '') || ' ' || coalesce(description, ''))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS ix_events_description_trgm ON events USING gin (description gin_trgm_ops);
@@ -0,0 +1,17 @@
+-- Store event metadata as JSONB with a jsonb_path_ops GIN index, and extract the
+-- hot lookup keys into generated columns with tenant/time composite indexes.
+
+ALTER TABLE events ALTER COLUMN metadata TYPE jsonb USING metadata::jsonb;
+
+ALTER TABLE events
+    ADD COLUMN IF NOT EXISTS person_id VARCHAR(64)
+        GENERATED ALWAYS AS (metadata->>'person_id') STORED,
+    ADD COLUMN IF NOT EXISTS license_plate VARCHAR(20)
+        GENERATED ALWAYS AS (upper(metadata->>'license_plate')) STORED,
+    ADD COLUMN IF NOT EXISTS zone_name VARCHAR(255)
+        GENERATED ALWAYS AS (metadata->>'zone_name') STORED;
+
+CREATE INDEX IF NOT EXISTS ix_events_metadata ON events USING gin (metadata jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS ix_events_tenant_id_person_id_created_at ON events (tenant_id, person_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_events_tenant_id_license_plate_created_at ON events (tenant_id, license_plate, created_at);
+CREATE INDEX IF NOT EXISTS ix_events_tenant_id_zone_name_created_at ON events (tenant_id, zone_name, created_at);
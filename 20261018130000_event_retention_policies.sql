@@ -0,0 +1,9 @@
+-- Per-tenant event retention; older events are archived to Parquet and deleted in batches.
+
+CREATE TABLE IF NOT EXISTS event_retention_policies (
+    tenant_id UUID PRIMARY KEY REFERENCES tenants(id),
+    retain_days INTEGER NOT NULL CHECK (retain_days > 0),
+    last_run_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ
+);
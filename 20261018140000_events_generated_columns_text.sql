@@ -0,0 +1,9 @@
+-- Generated metadata columns are TEXT: a value longer than the old VARCHAR
+-- limits (e.g. a 21-character OCR plate) made the whole INSERT fail.
+-- Generated columns are recomputed from their expression; dependent
+-- indexes are rebuilt.
+
+ALTER TABLE events
+    ALTER COLUMN person_id TYPE TEXT,
+    ALTER COLUMN license_plate TYPE TEXT,
+    ALTER COLUMN zone_name TYPE TEXT;
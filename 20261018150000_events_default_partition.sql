@@ -0,0 +1,6 @@
+-- Events whose created_at falls outside every monthly partition (late or
+-- backfilled events, cameras with a skewed clock) made the whole INSERT
+-- batch fail. They now land in a DEFAULT partition; partitions.py moves
+-- them into their month's partition when it is created.
+
+CREATE TABLE IF NOT EXISTS events_default PARTITION OF events DEFAULT;
@@ -3,12 +3,13 @@ from typing import Optional
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 
-from .database import get_db
-from .crud.user import get_user
-from .models import User
+from .database import get_async_db, get_async_read_db, AsyncReadSessionLocal, resolve_read_routing
+from .crud.user import get_user, get_user_by_email, set_password_hash
+from .password_hasher import password_hasher
+from .principal_cache import Principal, principal_cache
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -18,16 +19,24 @@ if not SECRET_KEY:
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Signed live-view URLs for clients that cannot send headers (<img>, WebSocket)
+STREAM_TOKEN_EXPIRE_SECONDS = int(os.getenv("JWT_STREAM_TOKEN_EXPIRE_SECONDS", "60"))
+STREAM_TOKEN_SCOPE = "live_view"
+
+# Trust role/tenant claims of tokens living at most this many seconds (0 disables)
+TRUSTED_CLAIMS_MAX_LIFETIME = int(os.getenv("AUTH_TRUSTED_CLAIMS_MAX_LIFETIME", "0"))
+
 security = HTTPBearer()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
+    issued_at = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = issued_at + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": issued_at})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -41,23 +50,59 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
-        if user_id is None:
+        # Scoped tokens (live-view URLs) never authenticate API calls
+        if user_id is None or payload.get("scope") is not None:
             raise credentials_exception
         return payload
     except JWTError:
         raise credentials_exception
 
-def get_current_user(
+def create_stream_token(user_id: str, tenant_id: str, camera_id: str) -> str:
+    """Short-lived token that only opens the live view of one camera"""
+    return create_access_token(
+        {"sub": user_id, "tenant_id": tenant_id, "camera_id": camera_id, "scope": STREAM_TOKEN_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS)
+    )
+
+def _principal_from_claims(token_data: dict) -> Optional[Principal]:
+    """Build the principal from signed claims, only for short-lived tokens"""
+    if TRUSTED_CLAIMS_MAX_LIFETIME <= 0:
+        return None
+    issued_at, expires_at = token_data.get("iat"), token_data.get("exp")
+    if not issued_at or not expires_at or expires_at - issued_at > TRUSTED_CLAIMS_MAX_LIFETIME:
+        return None
+    if not all(token_data.get(claim) for claim in ("role", "tenant_id", "email")):
+        return None
+    
+    return Principal(
+        id=token_data["sub"],
+        email=token_data["email"],
+        full_name=token_data.get("full_name", ""),
+        role=token_data["role"],
+        tenant_id=token_data["tenant_id"]
+    )
+
+async def get_current_user(
     token_data: dict = Depends(verify_token),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db)
+) -> Principal:
     user_id = token_data.get("sub")
-    user = get_user(db, user_id)
+    # Tag this request's sessions so commits pin the user's reads to the primary
+    db.info["principal_id"] = user_id
+    await resolve_read_routing(read_db, user_id)
+    
+    # Signed claims first, then the principal cache, then the database
+    user = _principal_from_claims(token_data) or principal_cache.get(user_id)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+        db_user = await db.run_sync(get_user, user_id)
+        if db_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        user = Principal.from_user(db_user)
+        principal_cache.set(user_id, user)
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,13 +110,64 @@ def get_current_user(
         )
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def authenticate_live_view(token: Optional[str], tenant_id: str, camera_id: str) -> Optional[Principal]:
+    """Principal allowed to watch `camera_id` in `tenant_id`, or None.
+
+    Only stream tokens for that camera (create_stream_token) are accepted,
+    so long-lived access tokens never end up in URLs. The token is only
+    checked when the stream opens; the caller still checks that the camera
+    belongs to the tenant.
+    """
+    if not token:
+        return None
+    try:
+        token_data = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    user_id = token_data.get("sub")
+    if not user_id:
+        return None
+    if token_data.get("scope") != STREAM_TOKEN_SCOPE or token_data.get("camera_id") != camera_id:
+        return None
+    
+    user = _principal_from_claims(token_data) or principal_cache.get(user_id)
+    if user is None:
+        async with AsyncReadSessionLocal() as db:
+            db_user = await db.run_sync(get_user, user_id)
+        if db_user is None:
+            return None
+        user = Principal.from_user(db_user)
+        principal_cache.set(user_id, user)
+    if (
+        not user.is_active
+        or user.role not in LIVE_VIEW_ROLES
+        or str(user.tenant_id) != str(tenant_id)
+        or str(token_data.get("tenant_id")) != str(tenant_id)
+    ):
+        return None
+    return user
+
+async def authenticate_user(db: AsyncSession, email: str, password: str, tenant_id: str = None):
+    """Check credentials with bcrypt on the hasher pool, upgrading outdated hashes"""
+    user = await db.run_sync(get_user_by_email, email, tenant_id)
+    if not user:
+        return None
+    
+    valid, new_hash = await password_hasher.verify(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        # Rehash-on-login: the plaintext is only available here
+        await db.run_sync(set_password_hash, user.id, new_hash)
+    return user
+
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 def require_role(required_roles: list):
-    def role_checker(current_user: User = Depends(get_current_active_user)):
+    def role_checker(current_user: Principal = Depends(get_current_active_user)):
         if current_user.role not in required_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -83,4 +179,7 @@ def require_role(required_roles: list):
 # Role-based dependencies
 require_admin = require_role(["admin"])
 require_admin_or_security = require_role(["admin", "security"])
-require_any_role = require_role(["admin", "security", "manager"])
\ No newline at end of file
+require_any_role = require_role(["admin", "security", "manager"])
+
+# Same roles as require_any_role, for live views authenticated by query token
+LIVE_VIEW_ROLES = ("admin", "security", "manager")
\ No newline at end of file
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Rebuild hourly event rollups from raw events for SMARTSECUREC3
+Run after deploying the rollup table or to repair drifted counts
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SessionLocal
+from crud.event_rollup import backfill_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild hourly event rollups")
+    parser.add_argument("--tenant-id", help="Only rebuild this tenant")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Start of range (ISO format)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="End of range (ISO format)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("Rebuilding event rollups...")
+        rows = backfill_rollups(db, args.tenant_id, args.since, args.until)
+        print(f"✅ Wrote {rows} hourly rollup rows")
+    except Exception as e:
+        print(f"❌ Error during backfill: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
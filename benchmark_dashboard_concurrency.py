@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the SMARTSECUREC3 dashboard API
+Simulates many dashboard users polling at once and reports latency percentiles
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+
+async def dashboard_user(host, port, path, token, requests, latencies, errors):
+    """One simulated user polling the dashboard over a keep-alive connection"""
+    reader, writer = await asyncio.open_connection(host, port)
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        f"Authorization: Bearer {token}\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    ).encode()
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            content_length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    content_length = int(value)
+            await reader.readexactly(content_length)
+
+            if b" 200 " in status_line:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors.append(status_line.decode().strip())
+    finally:
+        writer.close()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def run(args):
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+    latencies, errors = [], []
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        dashboard_user(host, port, parts.path, args.token, args.requests, latencies, errors)
+        for _ in range(args.users)
+    ], return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    errors.extend(str(r) for r in results if isinstance(r, Exception))
+
+    if not latencies:
+        print(f"❌ No successful requests ({len(errors)} errors, first: {errors[:1]})")
+        return 1
+
+    p99 = percentile(latencies, 0.99) * 1000
+    print(f"Users: {args.users}, requests: {len(latencies)} ok / {len(errors)} failed in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:.0f} req/s)")
+    print(f"Latency p50: {percentile(latencies, 0.50) * 1000:.1f} ms, "
+          f"p95: {percentile(latencies, 0.95) * 1000:.1f} ms, p99: {p99:.1f} ms")
+
+    if p99 > args.target_p99_ms or errors:
+        print(f"❌ p99 above {args.target_p99_ms:.0f} ms target or requests failed")
+        return 1
+    print(f"✅ p99 within {args.target_p99_ms:.0f} ms target")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent dashboard users")
+    parser.add_argument("--url", default="http://localhost:8000/api/v1/dashboard")
+    parser.add_argument("--token", default=os.getenv("BENCHMARK_TOKEN"), help="Bearer token for a tenant user")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per user")
+    parser.add_argument("--target-p99-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    if not args.token:
+        parser.error("--token or BENCHMARK_TOKEN is required")
+
+    # Run the API with DASHBOARD_CACHE_TTL=0 to measure the database path
+    # rather than cache hits.
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for SMARTSECUREC3 event inserts
+Compares events/s of the per-row create_event path with create_events_bulk
+Run against a scratch database: benchmark rows are deleted afterwards and the
+tenant's hourly rollups are rebuilt
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SessionLocal
+from models import Event
+from schemas import EventCreate
+from crud.event import create_event, create_events_bulk
+from crud.event_rollup import backfill_rollups
+
+MARKER = "insert-benchmark"
+
+def make_events(camera_id: str, count: int):
+    return [
+        EventCreate(
+            event_type="object_detection",
+            description=f"{MARKER} event {i}",
+            camera_id=camera_id,
+            confidence=0.9,
+            metadata={"benchmark": True, "sequence": i}
+        )
+        for i in range(count)
+    ]
+
+def time_per_row(db, events, tenant_id: str) -> float:
+    started = time.perf_counter()
+    for event in events:
+        create_event(db, event, tenant_id)
+    return len(events) / (time.perf_counter() - started)
+
+def time_bulk(db, events, tenant_id: str, batch_size: int) -> float:
+    started = time.perf_counter()
+    for offset in range(0, len(events), batch_size):
+        create_events_bulk(db, events[offset:offset + batch_size], tenant_id)
+    return len(events) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-row and bulk event inserts")
+    parser.add_argument("--tenant-id", required=True)
+    parser.add_argument("--camera-id", required=True, help="Existing camera of the tenant")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    events = make_events(args.camera_id, args.events)
+    started_at = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        per_row = time_per_row(db, events, args.tenant_id)
+        print(f"Per-row create_event:   {per_row:,.0f} events/s")
+
+        bulk = time_bulk(db, events, args.tenant_id, args.batch_size)
+        print(f"create_events_bulk ({args.batch_size}/batch): {bulk:,.0f} events/s ({bulk / per_row:.1f}x)")
+    finally:
+        db.rollback()
+        deleted = db.query(Event).filter(
+            Event.tenant_id == args.tenant_id,
+            Event.created_at >= started_at,
+            Event.description.like(f"{MARKER} %")
+        ).delete(synchronize_session=False)
+        db.commit()
+        backfill_rollups(db, args.tenant_id, started_at - timedelta(hours=1))
+        print(f"Cleaned up {deleted} benchmark events")
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark corpus for the natural-language event query compiler
+Checks each query compiles to the expected filters and times cold vs cached parses
+"""
+
+import os
+import sys
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from query_compiler import compile_query, _compile_normalized
+
+# (query, expected subset of CompiledQuery.to_dict())
+CORPUS = [
+    ("trucks at main gate yesterday after 6pm",
+     {"event_types": ["vehicle_detection"], "metadata": {"vehicle_type": "truck"},
+      "camera_terms": ["main gate"], "period": "yesterday", "after": "18:00:00"}),
+    ("unknown faces in warehouse A this week",
+     {"event_types": ["face_detection"], "metadata": {"name": "Unknown"},
+      "camera_terms": ["warehouse a"], "period": "this_week"}),
+    ("intrusions in the last 3 days", {"event_types": ["intrusion"], "period": "last_days", "period_amount": 3}),
+    ("every event for plate ABC-1234",
+     {"event_types": ["vehicle_detection"], "metadata": {"license_plate": "ABC-1234"}}),
+    ("MH12AB1234 today", {"metadata": {"license_plate": "MH12AB1234"}, "period": "today"}),
+    ("cars at exit gate between 9am and 5pm last week",
+     {"metadata": {"vehicle_type": "car"}, "camera_terms": ["exit gate"],
+      "period": "last_week", "after": "09:00:00", "before": "17:00:00"}),
+    ("gunny bags at loading dock today", {"event_types": ["object_detection"], "camera_terms": ["loading dock"]}),
+    ("people in the last hour", {"event_types": ["face_detection"], "period": "last_hours", "period_amount": 1}),
+    ("motorcycles past week", {"metadata": {"vehicle_type": "motorcycle"}, "period": "last_weeks"}),
+    ("buses this month", {"metadata": {"vehicle_type": "bus"}, "period": "this_month"}),
+    ("trespassers last night", {"event_types": ["intrusion"], "period": "last_night"}),
+    ("vehicles before 7am", {"event_types": ["vehicle_detection"], "before": "07:00:00"}),
+    ("faces at 9:30", {"event_types": ["face_detection"], "after": "09:30:00"}),
+    ("show me all events at warehouse B", {"camera_terms": ["warehouse b"], "event_types": []}),
+    ("unidentified visitors near the cold storage yesterday",
+     {"metadata": {"name": "Unknown"}, "camera_terms": ["cold storage"], "period": "yesterday"}),
+    ("lorries since midnight", {"metadata": {"vehicle_type": "truck"}, "after": "00:00:00"}),
+    ("employees last month", {"event_types": ["face_detection"], "period": "last_month"}),
+    ("breaches in restricted area this week",
+     {"event_types": ["intrusion"], "camera_terms": ["restricted area"], "period": "this_week"}),
+    ("forklift", {"text": "forklift", "event_types": []}),
+    ("camera offline", {"text": "camera offline", "event_types": []}),
+]
+
+def check_corpus():
+    failures = 0
+    for query, expected in CORPUS:
+        compiled = compile_query(query).to_dict()
+        mismatched = {k: (compiled.get(k), v) for k, v in expected.items() if compiled.get(k) != v}
+        if mismatched:
+            failures += 1
+            print(f"❌ {query!r}: {mismatched}")
+    print(f"{len(CORPUS) - failures}/{len(CORPUS)} corpus queries compiled as expected")
+    return failures
+
+def time_parses(rounds: int = 200):
+    _compile_normalized.cache_clear()
+    started = time.perf_counter()
+    for query, _ in CORPUS:
+        compile_query(query)
+    cold = (time.perf_counter() - started) / len(CORPUS)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query, _ in CORPUS:
+            compile_query(query)
+    warm = (time.perf_counter() - started) / (rounds * len(CORPUS))
+
+    print(f"Cold parse: {cold * 1e6:.1f} µs/query")
+    print(f"Cached parse: {warm * 1e6:.1f} µs/query ({_compile_normalized.cache_info()})")
+
+if __name__ == "__main__":
+    failures = check_corpus()
+    time_parses()
+    sys.exit(1 if failures else 0)
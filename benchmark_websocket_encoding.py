@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for SMARTSECUREC3 WebSocket encodings
+Replays a synthetic burst of detection events through JSON and MessagePack,
+per-message and coalesced, with and without permessage-deflate, and reports
+the server CPU and bandwidth each connected client costs per second of traffic
+"""
+
+import os
+import sys
+import time
+import zlib
+import random
+import argparse
+import uuid
+from datetime import datetime, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ws_encoding import ENCODINGS
+
+EVENT_TYPES = ["face_detection", "vehicle_detection", "object_detection", "intrusion"]
+
+def make_events(count: int, cameras: int):
+    camera_ids = [str(uuid.uuid4()) for _ in range(cameras)]
+    return [
+        {
+            "type": "event",
+            "data": {
+                "id": str(uuid.uuid4()),
+                "event_type": random.choice(EVENT_TYPES),
+                "description": f"Detection {i}",
+                "camera_id": random.choice(camera_ids),
+                "confidence": round(random.uniform(0.5, 1.0), 3),
+                "metadata": {"bbox": [random.randint(0, 1920) for _ in range(4)], "track_id": i % 50},
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+        }
+        for i in range(count)
+    ]
+
+def deflate_frames(frames):
+    """permessage-deflate with context takeover: one compressor per connection"""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    for frame in frames:
+        data = frame.encode() if isinstance(frame, str) else frame
+        # The trailing 00 00 ff ff of each sync flush is stripped on the wire
+        yield compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)[:-4]
+
+def run(encoding, events, per_frame: int, deflate: bool):
+    # Encoding happens once per message no matter how many sockets receive it
+    started = time.perf_counter()
+    encoded = [encoding.encode(event) for event in events]
+    shared_seconds = time.perf_counter() - started
+
+    # Batching and compression happen in every socket's writer
+    started = time.perf_counter()
+    frames = encoded if per_frame == 1 else [
+        encoding.batch(encoded[offset:offset + per_frame])
+        for offset in range(0, len(encoded), per_frame)
+    ]
+    if deflate:
+        frames = list(deflate_frames(frames))
+    client_seconds = time.perf_counter() - started
+    return shared_seconds, client_seconds, len(frames), sum(len(frame) for frame in frames)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare WebSocket encodings, batching and compression")
+    parser.add_argument("--rate", type=int, default=300, help="Events per second during the burst")
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--window-ms", type=int, default=100, help="Coalesce window to compare against")
+    parser.add_argument("--cameras", type=int, default=32)
+    parser.add_argument("--clients", type=int, default=200, help="Sockets subscribed to the tenant")
+    args = parser.parse_args()
+
+    events = make_events(args.rate * args.seconds, args.cameras)
+    per_window = max(1, args.rate * args.window_ms // 1000)
+    print(f"{len(events)} events at {args.rate}/s, {args.clients} clients, {args.window_ms}ms window")
+    print(f"{'mode':<34} {'frames/s':>9} {'KB/s/client':>12} {'CPU ms/s/client':>16} {'CPU ms/s total':>15}")
+
+    for name, encoding in ENCODINGS.items():
+        for per_frame in (1, per_window):
+            for deflate in (False, True):
+                shared, client, frames, size = run(encoding, events, per_frame, deflate)
+                label = f"{name} {'batched' if per_frame > 1 else 'per-message'}{' + deflate' if deflate else ''}"
+                per_client_ms = client / args.seconds * 1000
+                total_ms = (shared + client * args.clients) / args.seconds * 1000
+                print(
+                    f"{label:<34} {frames / args.seconds:>9.0f} {size / args.seconds / 1024:>12.1f} "
+                    f"{per_client_ms:>16.2f} {total_ms:>15.1f}"
+                )
+    if "msgpack" not in ENCODINGS:
+        print("msgpack not installed; MessagePack rows skipped")
+    print("Per-message rows exclude the per-frame syscall and framing cost that batching also removes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Called with (tenant_id, payload) for every message that should reach this worker's sockets
+DeliverCallback = Callable[[str, dict], Awaitable[None]]
+
+class LocalBroadcastBackend:
+    """Single-process backend: published messages go straight to local sockets"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.deliver: Optional[DeliverCallback] = None
+        self.published = 0
+
+    async def start(self, deliver: DeliverCallback):
+        self.deliver = deliver
+
+    async def stop(self):
+        self.deliver = None
+
+    async def publish(self, tenant_id: str, payload: dict):
+        self.published += 1
+        if self.deliver:
+            await self.deliver(tenant_id, payload)
+
+    def get_metrics(self) -> Dict:
+        return {"backend": self.name, "published": self.published}
+
+class RedisBroadcastBackend:
+    """Fans messages out to every API worker through Redis pub/sub.
+
+    Each tenant has a channel `<prefix><tenant_id>`. Every worker subscribes
+    to the pattern and relays what it receives to its own sockets, including
+    its own publishes, so all workers deliver in the same order. If Redis is
+    unreachable, publishes fall back to local delivery so clients on this
+    worker still get live events.
+    """
+
+    name = "redis"
+
+    def __init__(self, redis_url: str, channel_prefix: str = "ws:tenant:", reconnect_delay: float = 1.0):
+        import redis.asyncio as redis
+
+        self.redis = redis.Redis.from_url(redis_url)
+        self.channel_prefix = channel_prefix
+        self.reconnect_delay = reconnect_delay
+        self.deliver: Optional[DeliverCallback] = None
+        self.listener_task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.received = 0
+        self.publish_errors = 0
+
+    async def start(self, deliver: DeliverCallback):
+        self.deliver = deliver
+        self.listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self.listener_task:
+            self.listener_task.cancel()
+            try:
+                await self.listener_task
+            except asyncio.CancelledError:
+                pass
+        await self.redis.close()
+
+    async def publish(self, tenant_id: str, payload: dict):
+        try:
+            await self.redis.publish(f"{self.channel_prefix}{tenant_id}", json.dumps(payload))
+            self.published += 1
+        except Exception as e:
+            self.publish_errors += 1
+            logger.error(f"Redis broadcast publish failed, delivering locally only: {e}")
+            if self.deliver:
+                await self.deliver(tenant_id, payload)
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.channel_prefix}*")
+                async for item in pubsub.listen():
+                    if item["type"] != "pmessage":
+                        continue
+                    self.received += 1
+                    tenant_id = item["channel"].decode()[len(self.channel_prefix):]
+                    try:
+                        await self.deliver(tenant_id, json.loads(item["data"]))
+                    except Exception as e:
+                        logger.error(f"Error relaying broadcast to tenant {tenant_id}: {e}")
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                logger.error(f"Redis broadcast subscription lost, reconnecting: {e}")
+                await pubsub.close()
+                await asyncio.sleep(self.reconnect_delay)
+
+    def get_metrics(self) -> Dict:
+        return {
+            "backend": self.name,
+            "published": self.published,
+            "received": self.received,
+            "publish_errors": self.publish_errors
+        }
+
+def create_broadcast_backend(backend: str, redis_url: Optional[str] = None):
+    if backend == "redis" and redis_url:
+        try:
+            return RedisBroadcastBackend(redis_url)
+        except ImportError:
+            logger.warning("redis package not installed, using in-memory WebSocket broadcast")
+    return LocalBroadcastBackend()
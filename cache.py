@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class DashboardCache:
+    """Short-lived per-tenant cache for the dashboard payload.
+
+    Entries live for `ttl` seconds. Camera, person and vehicle writes drop
+    them immediately; event inserts do not, since the event bus commits
+    several times a second and the short TTL already bounds how stale event
+    counts get. With a Redis URL the cache is shared by every API worker;
+    otherwise it is kept in process memory.
+
+    The Redis client is synchronous, so on the event loop its calls run in
+    worker threads. Loads may read from a replica. For `replica_lag` seconds after an
+    invalidation a replica may not have the write yet, so such loads are
+    returned but not cached.
+    """
+
+    def __init__(self, ttl: float = 5.0, redis_url: Optional[str] = None, replica_lag: float = 5.0):
+        self.ttl = ttl
+        self.replica_lag = replica_lag
+        self.entries: Dict[str, tuple] = {}
+        self.invalidated: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        # Single-flight locks, dropped when their last waiter is done
+        self.load_locks: Dict[str, asyncio.Lock] = {}
+        self.load_waiters: Dict[str, int] = {}
+
+        self.redis = None
+        if redis_url:
+            try:
+                import redis
+                self.redis = redis.Redis.from_url(
+                    redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+                )
+            except ImportError:
+                logger.warning("redis package not installed, using in-memory dashboard cache")
+
+    def get(self, tenant_id: str) -> Optional[dict]:
+        payload = self._get(str(tenant_id))
+        if payload is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return payload
+
+    async def get_or_load(
+        self,
+        tenant_id: str,
+        loader: Callable[[], Awaitable[dict]],
+        from_replica: Optional[Callable[[], bool]] = None
+    ) -> dict:
+        """Cached payload, or a single shared load when concurrent requests miss.
+
+        `from_replica` tells, after the load, whether it was served by a replica.
+        """
+        key = str(tenant_id)
+        payload = await self._off_loop(self.get, key)
+        if payload is not None:
+            return payload
+
+        # Per-tenant single-flight: one request rebuilds, the rest wait for it
+        lock = self.load_locks.setdefault(key, asyncio.Lock())
+        self.load_waiters[key] = self.load_waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                payload = await self._off_loop(self._get, key)
+                if payload is None:
+                    self.loads += 1
+                    payload = await loader()
+                    if not (
+                        from_replica and from_replica()
+                        and await self._off_loop(self._recently_invalidated, key)
+                    ):
+                        await self._off_loop(self.set, key, payload)
+        finally:
+            self.load_waiters[key] -= 1
+            if not self.load_waiters[key]:
+                del self.load_waiters[key]
+                del self.load_locks[key]
+        return payload
+
+    async def _off_loop(self, fn, *args):
+        # Memory lookups are cheap; Redis round-trips must not block the loop
+        if self.redis is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    def set(self, tenant_id: str, payload: dict):
+        key = str(tenant_id)
+        if self.redis is not None:
+            try:
+                self.redis.set(self._redis_key(key), json.dumps(payload), px=int(self.ttl * 1000))
+                return
+            except Exception as e:
+                logger.error(f"Error writing dashboard cache to Redis: {e}")
+
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, payload)
+
+    def invalidate(self, tenant_id: str):
+        """Drop a tenant's entry; safe to call from CRUD code running on the event loop"""
+        key = str(tenant_id)
+        with self.lock:
+            self.entries.pop(key, None)
+            self.invalidated[key] = time.monotonic() + self.replica_lag
+
+        if self.redis is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Worker thread or script: blocking here is fine
+                self._invalidate_shared(key)
+            else:
+                loop.run_in_executor(None, self._invalidate_shared, key)
+
+    def _invalidate_shared(self, key: str):
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(self._redis_key(key))
+                pipe.set(self._invalidated_key(key), 1, px=int(self.replica_lag * 1000))
+                pipe.execute()
+        except Exception as e:
+            logger.error(f"Error invalidating dashboard cache in Redis: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            "backend": "redis" if self.redis is not None else "memory",
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads
+        }
+
+    def _get(self, key: str) -> Optional[dict]:
+        if self.redis is not None:
+            try:
+                cached = self.redis.get(self._redis_key(key))
+                return json.loads(cached) if cached else None
+            except Exception as e:
+                logger.error(f"Error reading dashboard cache from Redis: {e}")
+                return None
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            return payload
+
+    def _recently_invalidated(self, key: str) -> bool:
+        if self.redis is not None:
+            try:
+                return bool(self.redis.exists(self._invalidated_key(key)))
+            except Exception as e:
+                # Unknown, so do not cache a possibly stale load
+                logger.error(f"Error reading dashboard invalidations from Redis: {e}")
+                return True
+
+        with self.lock:
+            until = self.invalidated.get(key)
+            if until is None:
+                return False
+            if until < time.monotonic():
+                del self.invalidated[key]
+                return False
+            return True
+
+    def _redis_key(self, key: str) -> str:
+        return f"dashboard:{key}"
+
+    def _invalidated_key(self, key: str) -> str:
+        return f"dashboard_invalidated:{key}"
+
+# Global dashboard cache instance
+dashboard_cache = DashboardCache(
+    ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "5")),
+    redis_url=os.getenv("REDIS_URL") if os.getenv("DASHBOARD_CACHE_BACKEND", "memory") == "redis" else None,
+    # Same window read-your-writes uses to cover replica lag
+    replica_lag=float(os.getenv("READ_YOUR_WRITES_WINDOW", "5"))
+)
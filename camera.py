@@ -1,15 +1,21 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy import func, or_
+from typing import Optional, List, Iterable, Set
 import uuid
 
 from ..models import Camera
+from ..pagination import keyset_order, apply_keyset
+from ..cache import dashboard_cache
 from ..schemas import CameraCreate, CameraUpdate
 
 def get_camera(db: Session, camera_id: str) -> Optional[Camera]:
     return db.query(Camera).filter(Camera.id == camera_id).first()
 
-def get_cameras(db: Session, tenant_id: str, skip: int = 0, limit: int = 100) -> List[Camera]:
-    return db.query(Camera).filter(Camera.tenant_id == tenant_id).offset(skip).limit(limit).all()
+def get_cameras(db: Session, tenant_id: str, skip: int = 0, limit: int = 100, cursor: tuple = None) -> List[Camera]:
+    query = keyset_order(db.query(Camera).filter(Camera.tenant_id == tenant_id), Camera)
+    if cursor:
+        return apply_keyset(query, Camera, cursor).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
 
 def get_active_cameras(db: Session, tenant_id: str) -> List[Camera]:
     return db.query(Camera).filter(
@@ -17,6 +23,40 @@ def get_active_cameras(db: Session, tenant_id: str) -> List[Camera]:
         Camera.is_active == True
     ).all()
 
+def get_all_active_cameras(db: Session) -> List[Camera]:
+    """Active cameras of every tenant, for starting video processing"""
+    return db.query(Camera).filter(Camera.is_active == True).all()
+
+def find_camera_ids(db: Session, tenant_id: str, term: str) -> List[str]:
+    """Ids of cameras whose name or location contains `term`"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{escaped}%"
+    rows = db.query(Camera.id).filter(
+        Camera.tenant_id == tenant_id,
+        or_(Camera.name.ilike(pattern), Camera.location.ilike(pattern))
+    ).all()
+    return [row[0] for row in rows]
+
+def filter_tenant_camera_ids(db: Session, tenant_id: str, camera_ids: Iterable[uuid.UUID]) -> Set[str]:
+    """The subset of `camera_ids` that are cameras of this tenant, as strings"""
+    camera_ids = list(camera_ids)
+    if not camera_ids:
+        return set()
+    rows = db.query(Camera.id).filter(
+        Camera.tenant_id == tenant_id,
+        Camera.id.in_(camera_ids)
+    ).all()
+    return {str(row[0]) for row in rows}
+
+def count_cameras(db: Session, tenant_id: str) -> int:
+    return db.query(func.count(Camera.id)).filter(Camera.tenant_id == tenant_id).scalar()
+
+def count_active_cameras(db: Session, tenant_id: str) -> int:
+    return db.query(func.count(Camera.id)).filter(
+        Camera.tenant_id == tenant_id,
+        Camera.is_active == True
+    ).scalar()
+
 def create_camera(db: Session, camera: CameraCreate, tenant_id: str) -> Camera:
     db_camera = Camera(
         id=str(uuid.uuid4()),
@@ -29,6 +69,7 @@ def create_camera(db: Session, camera: CameraCreate, tenant_id: str) -> Camera:
     )
     db.add(db_camera)
     db.commit()
+    dashboard_cache.invalidate(db_camera.tenant_id)
     db.refresh(db_camera)
     return db_camera
 
@@ -42,6 +83,7 @@ def update_camera(db: Session, camera_id: str, camera_update: CameraUpdate) -> O
         setattr(db_camera, field, value)
     
     db.commit()
+    dashboard_cache.invalidate(db_camera.tenant_id)
     db.refresh(db_camera)
     return db_camera
 
@@ -50,8 +92,10 @@ def delete_camera(db: Session, camera_id: str) -> bool:
     if not db_camera:
         return False
     
+    tenant_id = db_camera.tenant_id
     db.delete(db_camera)
     db.commit()
+    dashboard_cache.invalidate(tenant_id)
     return True
 
 def toggle_camera_status(db: Session, camera_id: str) -> Optional[Camera]:
@@ -61,5 +105,6 @@ def toggle_camera_status(db: Session, camera_id: str) -> Optional[Camera]:
     
     db_camera.is_active = not db_camera.is_active
     db.commit()
+    dashboard_cache.invalidate(db_camera.tenant_id)
     db.refresh(db_camera)
     return db_camera
\ No newline at end of file
@@ -1,11 +1,30 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_
-from typing import Optional, List
-from datetime import datetime, timedelta
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import desc, and_, or_, insert, func, cast, Time
+from typing import Optional, List, Dict, Tuple, Iterator
+from datetime import datetime, timedelta, timezone
+import os
 import uuid
 
 from ..models import Event
+from ..pagination import keyset_order, apply_keyset
 from ..schemas import EventCreate
+from .event_rollup import increment_rollups
+from ..query_compiler import compile_query, resolve_time_range, QUERY_TIMEZONE
+from .camera import find_camera_ids
+
+# Metadata keys extracted into indexed generated columns on Event
+METADATA_COLUMNS = ("person_id", "license_plate", "zone_name")
+
+# Free-text search without a date range only looks this far back
+SEARCH_DEFAULT_DAYS = int(os.getenv("EVENT_SEARCH_DEFAULT_DAYS", "30"))
+# Only the newest matches are ranked, so ranking cost has a fixed ceiling
+SEARCH_RANK_CANDIDATES = int(os.getenv("EVENT_SEARCH_RANK_CANDIDATES", "1000"))
+
+# Columns written by event exports, in output order
+EXPORT_COLUMNS = (
+    Event.id, Event.created_at, Event.event_type, Event.camera_id,
+    Event.confidence, Event.description, Event.event_metadata
+)
 
 def get_event(db: Session, event_id: str) -> Optional[Event]:
     return db.query(Event).filter(Event.id == event_id).first()
@@ -18,9 +37,78 @@ def get_events(
     event_type: str = None,
     camera_id: str = None,
     start_date: datetime = None,
-    end_date: datetime = None
+    end_date: datetime = None,
+    cursor: tuple = None,
+    person_id: str = None,
+    license_plate: str = None,
+    zone_name: str = None,
+    archived: List[Event] = None
 ) -> List[Event]:
-    query = db.query(Event).filter(Event.tenant_id == tenant_id)
+    """One page of events, newest first.
+
+    `archived` holds cold-tier rows the caller already read with
+    retention.read_archived_events (outside the session, since the Parquet
+    scan is slow); they are merged into the page.
+    """
+    query = _filter_events(
+        db.query(Event), tenant_id, event_type, camera_id, start_date, end_date,
+        person_id, license_plate, zone_name
+    )
+    
+    query = keyset_order(query, Event)
+    if cursor:
+        query = apply_keyset(query, Event, cursor)
+        skip = 0
+    
+    if archived:
+        # Read enough of the hot tier to fill the page, then merge newest first
+        hot = query.limit(skip + limit).all()
+        hot_ids = {event.id for event in hot}
+        merged = hot + [event for event in archived if event.id not in hot_ids]
+        merged.sort(key=lambda event: (event.created_at, event.id), reverse=True)
+        return merged[skip:skip + limit]
+    
+    return query.offset(skip).limit(limit).all()
+
+def stream_events(
+    db: Session,
+    tenant_id: str,
+    event_type: str = None,
+    camera_id: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    person_id: str = None,
+    license_plate: str = None,
+    zone_name: str = None,
+    chunk_size: int = 1000
+) -> Iterator[List[tuple]]:
+    """Yield matching events oldest first, `chunk_size` plain rows at a time.
+
+    Uses a server-side cursor, so memory stays flat however many rows match.
+    """
+    query = _filter_events(
+        db.query(*EXPORT_COLUMNS), tenant_id, event_type, camera_id, start_date, end_date,
+        person_id, license_plate, zone_name
+    ).order_by(Event.created_at, Event.id)
+    
+    result = db.execute(
+        query.statement.execution_options(yield_per=chunk_size)
+    )
+    for partition in result.partitions():
+        yield partition
+
+def _filter_events(
+    query,
+    tenant_id: str,
+    event_type: str = None,
+    camera_id: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    person_id: str = None,
+    license_plate: str = None,
+    zone_name: str = None
+):
+    query = query.filter(Event.tenant_id == tenant_id)
     
     if event_type:
         query = query.filter(Event.event_type == event_type)
@@ -28,13 +116,22 @@ def get_events(
     if camera_id:
         query = query.filter(Event.camera_id == camera_id)
     
+    if person_id:
+        query = query.filter(Event.person_id == person_id)
+    
+    if license_plate:
+        query = query.filter(Event.license_plate == license_plate.upper())
+    
+    if zone_name:
+        query = query.filter(Event.zone_name == zone_name)
+    
     if start_date:
         query = query.filter(Event.created_at >= start_date)
     
     if end_date:
         query = query.filter(Event.created_at <= end_date)
     
-    return query.order_by(desc(Event.created_at)).offset(skip).limit(limit).all()
+    return query
 
 def get_recent_events(db: Session, tenant_id: str, hours: int = 24, limit: int = 10) -> List[Event]:
     since = datetime.utcnow() - timedelta(hours=hours)
@@ -45,16 +142,12 @@ def get_recent_events(db: Session, tenant_id: str, hours: int = 24, limit: int =
 
 def get_events_count_by_type(db: Session, tenant_id: str, hours: int = 24) -> dict:
     since = datetime.utcnow() - timedelta(hours=hours)
-    events = db.query(Event).filter(
+    rows = db.query(Event.event_type, func.count()).filter(
         Event.tenant_id == tenant_id,
         Event.created_at >= since
-    ).all()
+    ).group_by(Event.event_type).all()
     
-    counts = {}
-    for event in events:
-        counts[event.event_type] = counts.get(event.event_type, 0) + 1
-    
-    return counts
+    return {event_type: count for event_type, count in rows}
 
 def create_event(db: Session, event: EventCreate, tenant_id: str) -> Event:
     db_event = Event(
@@ -63,19 +156,206 @@ def create_event(db: Session, event: EventCreate, tenant_id: str) -> Event:
         description=event.description,
         camera_id=event.camera_id,
         confidence=event.confidence,
-        metadata=event.metadata,
-        tenant_id=tenant_id
+        event_metadata=event.metadata,
+        tenant_id=tenant_id,
+        created_at=datetime.now(timezone.utc)
     )
     db.add(db_event)
+    increment_rollups(db, [{
+        "tenant_id": tenant_id,
+        "camera_id": event.camera_id,
+        "event_type": event.event_type,
+        "created_at": db_event.created_at
+    }])
     db.commit()
     db.refresh(db_event)
     return db_event
 
-def search_events(db: Session, tenant_id: str, search_query: str, limit: int = 50) -> List[Event]:
-    return db.query(Event).filter(
+def create_events(db: Session, events: List[dict]) -> int:
+    """Insert many events in one transaction using a single executemany INSERT"""
+    if not events:
+        return 0
+    
+    now = datetime.now(timezone.utc)
+    rows = [
+        dict(event, id=event.get("id") or str(uuid.uuid4()), created_at=event.get("created_at") or now)
+        for event in events
+    ]
+    db.execute(insert(Event), rows)
+    increment_rollups(db, rows)
+    db.commit()
+    return len(rows)
+
+def create_events_bulk(db: Session, events: List[EventCreate], tenant_id: str) -> List[dict]:
+    """Insert a batch of API events with one INSERT ... RETURNING and no refreshes.
+
+    ids and created_at are generated client-side, so the only round-trips are
+    the multi-row INSERT (paged by insertmanyvalues for very large batches),
+    the rollup upsert and a single commit.
+    """
+    if not events:
+        return []
+    
+    created_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "event_type": event.event_type,
+            "description": event.description,
+            "camera_id": event.camera_id,
+            "confidence": event.confidence,
+            "event_metadata": event.metadata,
+            "tenant_id": tenant_id,
+            "created_at": created_at
+        }
+        for event in events
+    ]
+    inserted = db.execute(
+        insert(Event).returning(Event.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    increment_rollups(db, rows)
+    db.commit()
+    
+    return [dict(row, id=str(event_id)) for row, event_id in zip(rows, inserted)]
+
+def search_events(
+    db: Session,
+    tenant_id: str,
+    search_query: str,
+    limit: int = 50,
+    start_date: datetime = None,
+    end_date: datetime = None
+) -> List[Event]:
+    """Ranked full-text search with trigram substring fallback, both index-backed.
+
+    Without a date range the search covers the last SEARCH_DEFAULT_DAYS days,
+    and only the newest SEARCH_RANK_CANDIDATES matches are ranked.
+    """
+    if not start_date and not end_date:
+        start_date = datetime.now(timezone.utc) - timedelta(days=SEARCH_DEFAULT_DAYS)
+    
+    ts_query = func.websearch_to_tsquery("english", search_query)
+    pattern = "%" + search_query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    
+    query = db.query(Event).filter(
         Event.tenant_id == tenant_id,
         or_(
-            Event.description.ilike(f"%{search_query}%"),
-            Event.event_type.ilike(f"%{search_query}%")
+            Event.search_vector.op("@@")(ts_query),
+            Event.description.ilike(pattern)
         )
-    ).order_by(desc(Event.created_at)).limit(limit).all()
\ No newline at end of file
+    )
+    
+    if start_date:
+        query = query.filter(Event.created_at >= start_date)
+    
+    if end_date:
+        query = query.filter(Event.created_at <= end_date)
+    
+    candidates = aliased(
+        Event,
+        query.order_by(desc(Event.created_at)).limit(SEARCH_RANK_CANDIDATES).subquery()
+    )
+    rank = func.ts_rank_cd(candidates.search_vector, ts_query)
+    return db.query(candidates).order_by(desc(rank), desc(candidates.created_at)).limit(limit).all()
+
+def query_events(
+    db: Session,
+    tenant_id: str,
+    event_types: List[str] = None,
+    camera_ids: List[str] = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    metadata: Dict[str, str] = None,
+    time_of_day: Tuple = None,
+    text: str = None,
+    limit: int = 50
+) -> List[Event]:
+    """Structured event query.
+
+    Tenant, type, camera, date range, metadata and text filters are index
+    backed; the time-of-day window is evaluated on the rows they select.
+    """
+    query = db.query(Event).filter(Event.tenant_id == tenant_id)
+    
+    if event_types:
+        query = query.filter(Event.event_type.in_(event_types))
+    
+    if camera_ids:
+        query = query.filter(Event.camera_id.in_(camera_ids))
+    
+    if start_date:
+        query = query.filter(Event.created_at >= start_date)
+    
+    if end_date:
+        query = query.filter(Event.created_at <= end_date)
+    
+    for key, value in (metadata or {}).items():
+        if key in METADATA_COLUMNS:
+            column = getattr(Event, key)
+            query = query.filter(column == (value.upper() if key == "license_plate" else value))
+        else:
+            # Served by the jsonb_path_ops GIN index
+            query = query.filter(Event.event_metadata.contains({key: value}))
+    
+    if time_of_day:
+        # Daily window in the query time zone, applied within the date range
+        local_time = cast(func.timezone(QUERY_TIMEZONE.key, Event.created_at), Time)
+        after, before = time_of_day
+        if after and before and after > before:
+            # Overnight window such as 22:00-02:00
+            query = query.filter(or_(local_time >= after, local_time <= before))
+        else:
+            if after:
+                query = query.filter(local_time >= after)
+            if before:
+                query = query.filter(local_time <= before)
+    
+    if text:
+        query = query.filter(Event.search_vector.op("@@")(func.websearch_to_tsquery("english", text)))
+    
+    return query.order_by(desc(Event.created_at)).limit(limit).all()
+
+def natural_language_search(
+    db: Session,
+    tenant_id: str,
+    search_query: str,
+    limit: int = 50,
+    start_date: datetime = None,
+    end_date: datetime = None
+) -> List[Event]:
+    """Compile a natural-language query to structured filters, falling back to text search"""
+    compiled = compile_query(search_query)
+    if not compiled.is_structured():
+        return search_events(db, tenant_id, search_query, limit, start_date, end_date)
+    
+    camera_ids = []
+    text_terms = [compiled.text] if compiled.text else []
+    for term in compiled.camera_terms:
+        matched = find_camera_ids(db, tenant_id, term)
+        if matched:
+            camera_ids.extend(matched)
+        else:
+            # Unknown place names still narrow the search through the event text
+            text_terms.append(term)
+    
+    start, end, time_of_day = resolve_time_range(compiled)
+    if start_date and start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+    if end_date and end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+    if start_date and (start is None or start_date > start):
+        start = start_date
+    if end_date and (end is None or end_date < end):
+        end = end_date
+    
+    return query_events(
+        db, tenant_id,
+        event_types=list(compiled.event_types),
+        camera_ids=camera_ids,
+        start_date=start,
+        end_date=end,
+        metadata=dict(compiled.metadata),
+        time_of_day=time_of_day,
+        text=" ".join(text_terms),
+        limit=limit
+    )
\ No newline at end of file
@@ -0,0 +1,102 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EventAggregator:
+    """Merges repeated detections of the same subject into aggregated events.
+
+    The first sighting of a subject is emitted immediately so alerts are not
+    delayed. Repeats within `window` seconds of the last sighting are absorbed
+    and reported as one summary event when the subject goes idle, or every
+    `max_duration` seconds while it stays. Summaries carry the subject's
+    first_seen/last_seen and total `count` since its first sighting, plus
+    `segment_start`/`segment_count` for the repeats covered by that summary.
+    """
+
+    # Metadata fields identifying the subject of an event, in priority order
+    key_fields = ('person_id', 'license_plate', 'zone_name', 'name')
+
+    def __init__(self, window: float = 10.0, max_duration: float = 60.0):
+        self.window = window
+        self.max_duration = max_duration
+        self.groups: Dict[Tuple, Dict] = {}
+        self.lock = threading.Lock()
+
+    def add(self, event_type: str, metadata: Dict, timestamp: float) -> Optional[Dict]:
+        """Record an occurrence and return the metadata to emit now, if any"""
+        key = self._key(event_type, metadata)
+        if key is None or self.window <= 0:
+            return metadata
+
+        with self.lock:
+            group = self.groups.get(key)
+            if group is None:
+                self.groups[key] = {
+                    'event_type': event_type,
+                    'metadata': metadata,
+                    'first_seen': timestamp,
+                    'last_seen': timestamp,
+                    'count': 1,
+                    'segment_start': None,
+                    'segment_count': 0,
+                    'max_confidence': None
+                }
+                return dict(metadata, first_seen=timestamp, last_seen=timestamp, count=1)
+
+            group['metadata'] = metadata
+            group['last_seen'] = timestamp
+            group['count'] += 1
+            if group['segment_start'] is None:
+                group['segment_start'] = timestamp
+            group['segment_count'] += 1
+
+            confidence = metadata.get('confidence')
+            if confidence is not None:
+                if group['max_confidence'] is None or confidence > group['max_confidence']:
+                    group['max_confidence'] = confidence
+
+        return None
+
+    def flush(self, now: float, force: bool = False) -> List[Tuple[str, Dict]]:
+        """Close idle or long-running groups and return their summary events"""
+        summaries = []
+
+        with self.lock:
+            for key in list(self.groups.keys()):
+                group = self.groups[key]
+                idle = force or now - group['last_seen'] > self.window
+                overdue = (
+                    group['segment_start'] is not None
+                    and now - group['segment_start'] >= self.max_duration
+                )
+
+                if group['segment_count'] > 0 and (idle or overdue):
+                    metadata = dict(
+                        group['metadata'],
+                        first_seen=group['first_seen'],
+                        last_seen=group['last_seen'],
+                        count=group['count'],
+                        segment_start=group['segment_start'],
+                        segment_count=group['segment_count'],
+                        aggregated=True
+                    )
+                    if group['max_confidence'] is not None:
+                        metadata['confidence'] = group['max_confidence']
+                    summaries.append((group['event_type'], metadata))
+
+                    group['segment_start'] = None
+                    group['segment_count'] = 0
+                    group['max_confidence'] = None
+
+                if idle:
+                    del self.groups[key]
+
+        return summaries
+
+    def _key(self, event_type: str, metadata: Dict) -> Optional[Tuple]:
+        for field in self.key_fields:
+            if metadata.get(field) is not None:
+                return (event_type, field, metadata[field])
+        return None
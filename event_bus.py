@@ -0,0 +1,251 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+import logging
+from datetime import datetime, timezone
+from queue import Queue, Empty, Full
+from typing import Dict, List, Optional
+
+from .database import SessionLocal
+from .crud import event as crud_event
+from .websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+ALERT_EVENT_TYPES = ['intrusion', 'unauthorized_access']
+
+DROP_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+class EventBus:
+    """Bounded queue between the AI pipeline and the database/WebSocket consumers.
+
+    Camera threads publish events without blocking on slow consumers. A single
+    writer thread group-commits queued events in batches and then fans them out
+    to the ConnectionManager on the application event loop.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        drop_policy: str = "drop_oldest",
+        block_timeout: float = 0.05
+    ):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+        self.queue: Queue = Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.is_running = False
+        self.writer_thread = None
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            "published": 0,
+            "dropped": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "last_batch_ms": 0.0,
+            "max_queue_depth": 0
+        }
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start the writer thread; `loop` is used for WebSocket fan-out"""
+        if self.is_running:
+            return
+
+        self.loop = loop
+        self.is_running = True
+        self.writer_thread = threading.Thread(target=self._run)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+        logger.info(f"Event bus started (policy={self.drop_policy}, batch_size={self.batch_size})")
+
+    def stop(self):
+        """Stop the writer thread after draining queued events"""
+        self.is_running = False
+        if self.writer_thread:
+            self.writer_thread.join(timeout=10)
+        logger.info("Event bus stopped")
+
+    def publish(self, event_data: Dict) -> bool:
+        """Queue an event from a camera thread; returns False if it was dropped"""
+        try:
+            if self.drop_policy == "block":
+                self.queue.put(event_data, timeout=self.block_timeout)
+            elif self.drop_policy == "drop_newest":
+                self.queue.put_nowait(event_data)
+            else:
+                self._put_dropping_oldest(event_data)
+        except Full:
+            self._record(dropped=1)
+            logger.warning(f"Event bus full, dropped {event_data.get('event_type')} event")
+            return False
+
+        self._record(published=1)
+        return True
+
+    def get_metrics(self) -> Dict:
+        """Queue depth and throughput counters"""
+        with self.metrics_lock:
+            metrics = dict(self.metrics)
+        metrics["queue_depth"] = self.queue.qsize()
+        metrics["queue_capacity"] = self.queue.maxsize
+        metrics["drop_policy"] = self.drop_policy
+        return metrics
+
+    def _put_dropping_oldest(self, event_data: Dict):
+        while True:
+            try:
+                self.queue.put_nowait(event_data)
+                return
+            except Full:
+                try:
+                    self.queue.get_nowait()
+                    self._record(dropped=1)
+                except Empty:
+                    pass
+
+    def _record(self, **counters):
+        with self.metrics_lock:
+            for name, value in counters.items():
+                self.metrics[name] += value
+            depth = self.queue.qsize()
+            if depth > self.metrics["max_queue_depth"]:
+                self.metrics["max_queue_depth"] = depth
+
+    def _run(self):
+        """Writer loop: collect a batch, group-commit it, fan it out"""
+        while self.is_running or not self.queue.empty():
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+
+    def _collect_batch(self) -> List[Dict]:
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch: List[Dict]):
+        started = time.perf_counter()
+        rows = [self._to_row(event_data) for event_data in batch]
+
+        db = SessionLocal()
+        try:
+            written = self._insert_rows(db, rows)
+        finally:
+            db.close()
+
+        with self.metrics_lock:
+            self.metrics["written"] += len(written)
+            self.metrics["batches"] += 1
+            self.metrics["last_batch_size"] = len(rows)
+            self.metrics["last_batch_ms"] = (time.perf_counter() - started) * 1000
+
+        if written:
+            self._fan_out(written)
+
+    def _insert_rows(self, db, rows: List[Dict]) -> List[Dict]:
+        """Insert rows, bisecting a failed batch so only the bad rows are dropped.
+
+        A batch with k bad rows costs O(k log n) extra round-trips; the common
+        all-good case stays one INSERT and one commit.
+        """
+        try:
+            crud_event.create_events(db, rows)
+            return rows
+        except Exception as e:
+            db.rollback()
+            if len(rows) == 1:
+                self._record(failed=1)
+                logger.error(f"Dropped {rows[0]['event_type']} event from camera {rows[0]['camera_id']}: {e}")
+                return []
+            logger.warning(f"Event batch of {len(rows)} failed, splitting: {e}")
+
+        middle = len(rows) // 2
+        return self._insert_rows(db, rows[:middle]) + self._insert_rows(db, rows[middle:])
+
+    def _fan_out(self, rows: List[Dict]):
+        """Hand committed events to the ConnectionManager on the app loop"""
+        if self.loop is None or self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._broadcast(rows), self.loop)
+
+    async def _broadcast(self, rows: List[Dict]):
+        for row in rows:
+            try:
+                event_data = {
+                    "id": row["id"],
+                    "event_type": row["event_type"],
+                    "description": row["description"],
+                    "camera_id": str(row["camera_id"]),
+                    "confidence": row["confidence"],
+                    "created_at": row["created_at"].isoformat()
+                }
+                tenant_id = str(row["tenant_id"])
+                await manager.broadcast_event(event_data, tenant_id)
+                if row["event_type"] in ALERT_EVENT_TYPES:
+                    await manager.broadcast_alert(event_data, tenant_id)
+            except Exception as e:
+                logger.error(f"Error broadcasting event {row['id']}: {e}")
+
+    def _to_row(self, event_data: Dict) -> Dict:
+        metadata = event_data.get("metadata") or {}
+        return {
+            "id": str(uuid.uuid4()),
+            "event_type": event_data["event_type"],
+            "description": self._describe(event_data),
+            "camera_id": event_data["camera_id"],
+            "confidence": metadata.get("confidence"),
+            "event_metadata": metadata,
+            "tenant_id": event_data["tenant_id"],
+            "created_at": datetime.fromtimestamp(event_data["timestamp"], tz=timezone.utc)
+        }
+
+    def _describe(self, event_data: Dict) -> str:
+        metadata = event_data.get("metadata") or {}
+        event_type = event_data["event_type"]
+
+        if event_type == "face_detection":
+            description = f"Face detected: {metadata.get('name', 'Unknown')}"
+        elif event_type == "vehicle_detection":
+            description = f"Vehicle detected: {metadata.get('license_plate')} ({metadata.get('vehicle_type')})"
+        elif event_type == "object_detection":
+            description = f"{metadata.get('object_type', 'Object')} count: {metadata.get('count', 0)}"
+        elif event_type == "intrusion":
+            description = f"Intrusion detected in {metadata.get('zone_name')}"
+        else:
+            description = event_type.replace("_", " ").capitalize()
+
+        if metadata.get("aggregated"):
+            description += f" (seen {metadata.get('count')} times)"
+        return f"{description} on {event_data.get('camera_name', event_data['camera_id'])}"
+
+# Global event bus instance; pass `event_bus.publish` as the VideoManager event_callback
+event_bus = EventBus(
+    max_queue_size=int(os.getenv("EVENT_BUS_MAX_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("EVENT_BUS_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("EVENT_BUS_FLUSH_INTERVAL", "0.5")),
+    drop_policy=os.getenv("EVENT_BUS_DROP_POLICY", "drop_oldest")
+)
@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Iterator, List
+
+from .database import ReadSessionLocal
+from .crud.event import stream_events
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 5000
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+EXPORT_FIELDS = ["id", "created_at", "event_type", "camera_id", "confidence", "description", "metadata"]
+
+def export_events(tenant_id: str, format: str = "ndjson", **filters) -> Iterator[bytes]:
+    """Stream a tenant's events as encoded chunks, one chunk per cursor batch.
+
+    Runs on its own replica session so the export outlives the request's
+    session; Starlette iterates sync generators in a worker thread.
+    """
+    encoders = {"ndjson": _encode_ndjson, "csv": _encode_csv, "parquet": _encode_parquet}
+    db = ReadSessionLocal()
+    try:
+        chunks = stream_events(db, tenant_id, chunk_size=EXPORT_CHUNK_SIZE, **filters)
+        yield from encoders[format](chunks)
+    except Exception as e:
+        # Headers are already sent; the truncated body is all the client can see
+        logger.error(f"Event export for tenant {tenant_id} failed: {e}")
+        raise
+    finally:
+        db.close()
+
+def export_filename(format: str) -> str:
+    return f"events-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{EXPORT_FORMATS[format][1]}"
+
+def _row_values(row) -> list:
+    event_id, created_at, event_type, camera_id, confidence, description, metadata = row
+    return [str(event_id), created_at, event_type, str(camera_id), confidence, description, metadata]
+
+def _encode_ndjson(chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    for rows in chunks:
+        lines = []
+        for row in rows:
+            record = dict(zip(EXPORT_FIELDS, _row_values(row)))
+            record["created_at"] = record["created_at"].isoformat()
+            lines.append(json.dumps(record))
+        yield ("\n".join(lines) + "\n").encode()
+
+def _encode_csv(chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for rows in chunks:
+        for row in rows:
+            values = _row_values(row)
+            values[1] = values[1].isoformat()
+            values[6] = json.dumps(values[6]) if values[6] is not None else ""
+            writer.writerow(values)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+def _encode_parquet(chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("event_type", pa.string()),
+        ("camera_id", pa.string()),
+        ("confidence", pa.float64()),
+        ("description", pa.string()),
+        ("metadata", pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    for rows in chunks:
+        # One row group per cursor batch
+        columns = list(zip(*(_row_values(row) for row in rows)))
+        columns[6] = [json.dumps(value) if value is not None else None for value in columns[6]]
+        writer.write_table(pa.Table.from_arrays([list(column) for column in columns], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
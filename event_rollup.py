@@ -0,0 +1,163 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, text, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import Text
+from sqlalchemy.dialects.postgresql import insert
+from typing import Iterable, List
+from datetime import datetime, timedelta, timezone
+
+from ..models import Event, EventRollup
+
+DETECTION_EVENT_TYPES = ['face_detection', 'vehicle_detection', 'object_detection']
+
+# Postgres advisory lock key for rollup rebuilds. Writers hold it shared (globally and
+# per tenant) for their transaction; backfill_rollups holds it exclusively, so a rebuild
+# never interleaves with live increments
+ROLLUP_LOCK_KEY = 0x53534352  # "SSCR"
+
+_lock_tenants_shared = text(
+    "SELECT pg_advisory_xact_lock_shared(:key, hashtext(t)) "
+    "FROM (SELECT unnest(:tenants) AS t ORDER BY 1) AS tenants"
+).bindparams(bindparam("tenants", type_=ARRAY(Text)))
+
+def hour_bucket(value: datetime) -> datetime:
+    """Start of the UTC hour containing `value`"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def increment_rollups(db: Session, events: Iterable[dict]) -> None:
+    """Add events to their hourly rollup rows inside the caller's transaction"""
+    counts = {}
+    for event in events:
+        key = (
+            str(event["tenant_id"]),
+            str(event["camera_id"]),
+            event["event_type"],
+            hour_bucket(event["created_at"])
+        )
+        counts[key] = counts.get(key, 0) + 1
+
+    if not counts:
+        return
+
+    # Wait out a rebuild of these tenants' rollups; shared, so writers never block each other
+    db.execute(text("SELECT pg_advisory_xact_lock_shared(:key)"), {"key": ROLLUP_LOCK_KEY})
+    db.execute(_lock_tenants_shared, {"key": ROLLUP_LOCK_KEY, "tenants": sorted({key[0] for key in counts})})
+
+    # Rows in conflict-key order, so concurrent upserts lock shared rows in the same
+    # order and cannot deadlock
+    stmt = insert(EventRollup).values([
+        {
+            "tenant_id": tenant_id,
+            "camera_id": camera_id,
+            "event_type": event_type,
+            "bucket": bucket,
+            "count": count
+        }
+        for (tenant_id, camera_id, event_type, bucket), count in sorted(counts.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            EventRollup.tenant_id, EventRollup.camera_id,
+            EventRollup.event_type, EventRollup.bucket
+        ],
+        set_={"count": EventRollup.count + stmt.excluded.count}
+    )
+    db.execute(stmt)
+
+def backfill_rollups(
+    db: Session,
+    tenant_id: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None
+) -> int:
+    """Rebuild hourly rollups from raw events for the given tenant and range.
+
+    Holds the rollup lock exclusively until commit: increments already in
+    flight finish first (so the rebuild sees their events) and later ones wait
+    and then add to the rebuilt rows, so none is lost or double counted.
+    """
+    if tenant_id:
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:key, hashtext(:tenant_id))"),
+            {"key": ROLLUP_LOCK_KEY, "tenant_id": str(tenant_id)}
+        )
+    else:
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+
+    start_bucket = hour_bucket(start_date) if start_date else None
+
+    delete_query = db.query(EventRollup)
+    if tenant_id:
+        delete_query = delete_query.filter(EventRollup.tenant_id == tenant_id)
+    if start_bucket:
+        delete_query = delete_query.filter(EventRollup.bucket >= start_bucket)
+    if end_date:
+        delete_query = delete_query.filter(EventRollup.bucket <= end_date)
+    delete_query.delete(synchronize_session=False)
+
+    # UTC hour, matching hour_bucket() on the incremental path
+    bucket = func.timezone("UTC", func.date_trunc("hour", func.timezone("UTC", Event.created_at)))
+    source = select(
+        Event.tenant_id, Event.camera_id, Event.event_type, bucket, func.count()
+    ).group_by(Event.tenant_id, Event.camera_id, Event.event_type, bucket)
+    if tenant_id:
+        source = source.where(Event.tenant_id == tenant_id)
+    if start_bucket:
+        source = source.where(Event.created_at >= start_bucket)
+    if end_date:
+        # Include the whole hour containing end_date, matching the delete above
+        source = source.where(bucket <= end_date)
+
+    result = db.execute(insert(EventRollup).from_select(
+        ["tenant_id", "camera_id", "event_type", "bucket", "count"], source
+    ))
+    db.commit()
+    return result.rowcount
+
+def get_event_trends(
+    db: Session,
+    tenant_id: str,
+    days: int = 7,
+    granularity: str = "day",
+    camera_id: str = None
+) -> List[dict]:
+    """Per-period detection and event totals read from the hourly rollups"""
+    now = datetime.now(timezone.utc)
+    if granularity == "hour":
+        step = timedelta(hours=1)
+        first = hour_bucket(now) - timedelta(days=days) + step
+    else:
+        step = timedelta(days=1)
+        first = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+
+    # Truncate in UTC so day boundaries do not depend on the session time zone
+    period = func.date_trunc(granularity, func.timezone("UTC", EventRollup.bucket))
+    query = db.query(
+        period, EventRollup.event_type, func.sum(EventRollup.count)
+    ).filter(
+        EventRollup.tenant_id == tenant_id,
+        EventRollup.bucket >= first
+    )
+    if camera_id:
+        query = query.filter(EventRollup.camera_id == camera_id)
+    rows = query.group_by(period, EventRollup.event_type).all()
+
+    totals = {}
+    for period_start, event_type, count in rows:
+        entry = totals.setdefault(period_start, {"detections": 0, "events": 0})
+        entry["events"] += int(count)
+        if event_type in DETECTION_EVENT_TYPES:
+            entry["detections"] += int(count)
+
+    # Emit every period in the range, including empty ones
+    trends = []
+    current = first.replace(tzinfo=None)
+    end = now.replace(tzinfo=None)
+    while current <= end:
+        entry = totals.get(current, {"detections": 0, "events": 0})
+        label = current.isoformat() if granularity == "hour" else current.date().isoformat()
+        trends.append({"date": label, **entry})
+        current += step
+    return trends
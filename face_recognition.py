@@ -47,50 +47,86 @@ class FaceRecognitionService:
             face_locations = face_recognition.face_locations(frame)
             face_encodings = face_recognition.face_encodings(frame, face_locations)
             
+            return [
+                self._match_face(face_encoding, face_location, threshold)
+                for face_location, face_encoding in zip(face_locations, face_encodings)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error recognizing faces: {e}")
+            return []
+    
+    def recognize_faces_in_regions(self, frame: np.ndarray, regions: List[Dict],
+                                   threshold: float = 0.6, upper_fraction: float = 0.5) -> List[Dict]:
+        """Recognize faces only inside the upper part of the given person boxes"""
+        try:
+            frame_height, frame_width = frame.shape[:2]
             results = []
             
-            for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-                matches = face_recognition.compare_faces(
-                    self.known_face_encodings, 
-                    face_encoding,
-                    tolerance=threshold
-                )
-                
-                name = "Unknown"
-                person_id = None
-                confidence = 0.0
-                
-                # Find the best match
-                face_distances = face_recognition.face_distance(
-                    self.known_face_encodings, 
-                    face_encoding
-                )
+            for region in regions:
+                x1 = max(0, region['x1'])
+                y1 = max(0, region['y1'])
+                x2 = min(frame_width, region['x2'])
+                y2 = min(frame_height, y1 + int((region['y2'] - region['y1']) * upper_fraction))
+                if x2 <= x1 or y2 <= y1:
+                    continue
                 
-                if len(face_distances) > 0:
-                    best_match_index = np.argmin(face_distances)
-                    if matches[best_match_index]:
-                        name = self.known_face_names[best_match_index]
-                        person_id = self.known_face_ids[best_match_index]
-                        confidence = 1.0 - face_distances[best_match_index]
+                crop = np.ascontiguousarray(frame[y1:y2, x1:x2])
+                face_locations = face_recognition.face_locations(crop)
+                if not face_locations:
+                    continue
+                face_encodings = face_recognition.face_encodings(crop, face_locations)
                 
-                results.append({
-                    'person_id': person_id,
-                    'name': name,
-                    'confidence': confidence,
-                    'bounding_box': {
-                        'top': top,
-                        'right': right,
-                        'bottom': bottom,
-                        'left': left
-                    }
-                })
+                for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
+                    # Map crop coordinates back to the full frame
+                    face_location = (top + y1, right + x1, bottom + y1, left + x1)
+                    results.append(self._match_face(face_encoding, face_location, threshold))
             
             return results
             
         except Exception as e:
-            logger.error(f"Error recognizing faces: {e}")
+            logger.error(f"Error recognizing faces in regions: {e}")
             return []
     
+    def _match_face(self, face_encoding: np.ndarray, face_location: tuple, threshold: float) -> Dict:
+        """Match a face encoding against the known faces"""
+        top, right, bottom, left = face_location
+        
+        name = "Unknown"
+        person_id = None
+        confidence = 0.0
+        
+        if self.known_face_encodings:
+            matches = face_recognition.compare_faces(
+                self.known_face_encodings, 
+                face_encoding,
+                tolerance=threshold
+            )
+            
+            # Find the best match
+            face_distances = face_recognition.face_distance(
+                self.known_face_encodings, 
+                face_encoding
+            )
+            
+            best_match_index = np.argmin(face_distances)
+            if matches[best_match_index]:
+                name = self.known_face_names[best_match_index]
+                person_id = self.known_face_ids[best_match_index]
+                confidence = 1.0 - face_distances[best_match_index]
+        
+        return {
+            'person_id': person_id,
+            'name': name,
+            'confidence': confidence,
+            'bounding_box': {
+                'top': top,
+                'right': right,
+                'bottom': bottom,
+                'left': left
+            }
+        }
+    
     def draw_face_boxes(self, frame: np.ndarray, face_results: List[Dict]) -> np.ndarray:
         """Draw bounding boxes around detected faces"""
         for result in face_results:
@@ -0,0 +1,4 @@
+#!/bin/bash
+# Allow streaming replicas on the compose network to connect for pg_basebackup/WAL
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
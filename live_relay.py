@@ -0,0 +1,99 @@
+import logging
+import time
+import uuid
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RedisLiveRelay:
+    """Carries encoded live-view frames from the capturing worker to the others.
+
+    Only the worker that owns video processing has camera frames. It
+    announces the cameras it captures under `<prefix>source:<camera_id>`.
+    Workers with viewers of such a camera record which quality tiers they
+    need in the sorted set `<prefix>demand:<camera_id>` (scored by expiry),
+    and the owner publishes each tick's JPEG for those tiers on
+    `<prefix>frame:<camera_id>:<tier>`. Frames are encoded once on the owner
+    whatever the number of workers or viewers.
+    """
+
+    name = "redis"
+
+    def __init__(self, redis_url: str, prefix: str = "live:", ttl: float = 3.0):
+        import redis.asyncio as redis
+
+        self.redis = redis.Redis.from_url(redis_url)
+        self.prefix = prefix
+        self.ttl = ttl
+        self.worker_id = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+
+    async def close(self):
+        await self.redis.close()
+
+    # Capturing worker
+
+    async def announce(self, camera_ids: Iterable[str]):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for camera_id in camera_ids:
+                pipe.set(f"{self.prefix}source:{camera_id}", self.worker_id, px=int(self.ttl * 1000))
+            await pipe.execute()
+
+    async def remote_tiers(self, camera_ids: Iterable[str]) -> Dict[str, Set[int]]:
+        """Quality tiers other workers currently need, per camera"""
+        camera_ids = list(camera_ids)
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for camera_id in camera_ids:
+                pipe.zrangebyscore(f"{self.prefix}demand:{camera_id}", now, "+inf")
+            results = await pipe.execute()
+
+        tiers = {}
+        for camera_id, members in zip(camera_ids, results):
+            if members:
+                tiers[camera_id] = {int(member.decode().split(":", 1)[0]) for member in members}
+        return tiers
+
+    async def publish(self, camera_id: str, tier: int, jpeg: bytes):
+        await self.redis.publish(f"{self.prefix}frame:{camera_id}:{tier}", jpeg)
+        self.published += 1
+
+    # Relaying workers
+
+    async def is_captured(self, camera_id: str) -> bool:
+        return bool(await self.redis.exists(f"{self.prefix}source:{camera_id}"))
+
+    async def request(self, camera_id: str, tiers: Iterable[int]):
+        key = f"{self.prefix}demand:{camera_id}"
+        expires_at = time.time() + self.ttl
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(key, "-inf", time.time())
+            pipe.zadd(key, {f"{tier}:{self.worker_id}": expires_at for tier in tiers})
+            pipe.expire(key, int(self.ttl) + 1)
+            await pipe.execute()
+
+    async def frames(self, camera_id: str) -> AsyncIterator[Tuple[int, bytes]]:
+        """(tier, jpeg) for every frame the capturing worker publishes for this camera"""
+        pubsub = self.redis.pubsub()
+        prefix = f"{self.prefix}frame:{camera_id}:"
+        try:
+            await pubsub.psubscribe(f"{prefix}*")
+            async for item in pubsub.listen():
+                if item["type"] != "pmessage":
+                    continue
+                self.received += 1
+                yield int(item["channel"].decode()[len(prefix):]), item["data"]
+        finally:
+            await pubsub.close()
+
+    def get_metrics(self) -> Dict:
+        return {"backend": self.name, "published": self.published, "received": self.received}
+
+def create_live_relay(backend: str, redis_url: Optional[str] = None) -> Optional[RedisLiveRelay]:
+    if backend == "redis" and redis_url:
+        try:
+            return RedisLiveRelay(redis_url)
+        except ImportError:
+            logger.warning("redis package not installed, live view is only served by the capturing worker")
+    return None
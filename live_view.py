@@ -0,0 +1,405 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+import cv2
+
+from .video_manager import video_manager
+from .live_relay import create_live_relay
+
+logger = logging.getLogger(__name__)
+
+LIVE_VIEW_FPS = float(os.getenv("LIVE_VIEW_FPS", "10"))
+LIVE_VIEW_MAX_VIEWERS = int(os.getenv("LIVE_VIEW_MAX_VIEWERS", "50"))  # per camera
+LIVE_VIEW_STEP_UP_FRAMES = int(os.getenv("LIVE_VIEW_STEP_UP_FRAMES", "50"))
+# A relayed stream with no frame for this long is treated as ended
+LIVE_VIEW_RELAY_TIMEOUT = float(os.getenv("LIVE_VIEW_RELAY_TIMEOUT", "5"))  # seconds
+
+# (JPEG quality, scale) per tier, best first; viewers that fall behind step down
+QUALITY_TIERS = [(85, 1.0), (70, 1.0), (55, 0.75), (40, 0.5)]
+
+MJPEG_BOUNDARY = "frame"
+
+class LiveViewUnavailable(Exception):
+    """Raised when a camera is not being captured (here or, with a relay, anywhere) or is at its viewer limit"""
+
+class LiveViewer:
+    """One viewer of a camera: a single-slot mailbox holding its newest frame.
+
+    A frame still waiting when the next tick arrives means the viewer cannot
+    keep up, so the stale frame is replaced and the viewer drops one quality
+    tier. After LIVE_VIEW_STEP_UP_FRAMES frames taken on time it climbs back.
+    """
+
+    def __init__(self, camera_id: str, tier: int = 0):
+        self.camera_id = camera_id
+        self.tier = tier
+        self.slot: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.connected_at = time.time()
+        self.on_time = 0
+        self.sent = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+
+    def adapt(self):
+        """Adjust the quality tier before the next frame is encoded"""
+        if self.slot.full():
+            self.slot.get_nowait()
+            self.skipped += 1
+            self.on_time = 0
+            self.tier = min(self.tier + 1, len(QUALITY_TIERS) - 1)
+        elif self.tier > 0:
+            self.on_time += 1
+            if self.on_time >= LIVE_VIEW_STEP_UP_FRAMES:
+                self.on_time = 0
+                self.tier -= 1
+
+    def put(self, jpeg: Optional[bytes]):
+        # None tells the viewer the stream has ended
+        if self.slot.full():
+            self.slot.get_nowait()
+        self.slot.put_nowait(jpeg)
+
+    async def next_frame(self) -> Optional[bytes]:
+        jpeg = await self.slot.get()
+        if jpeg is not None:
+            self.sent += 1
+            self.bytes_sent += len(jpeg)
+        return jpeg
+
+    def get_metrics(self) -> Dict:
+        quality, scale = QUALITY_TIERS[self.tier]
+        return {
+            "quality": quality,
+            "scale": scale,
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "bytes_sent": self.bytes_sent,
+            "connected_seconds": round(time.time() - self.connected_at)
+        }
+
+def render_frame(frame, processor, tiers: Iterable[int]) -> Dict[int, bytes]:
+    """Annotate one frame and JPEG-encode it once per quality tier in use.
+
+    Boxes come from the latest inference pass, which runs at the processor's
+    detection interval, so they may trail the video slightly.
+    """
+    annotated = frame.copy()
+    detections = processor.get_latest_detections()
+    processor.face_service.draw_face_boxes(annotated, detections['faces'])
+    processor.vehicle_service.draw_vehicle_boxes(annotated, detections['vehicles'])
+    processor.object_service.draw_object_boxes(annotated, detections['objects'])
+
+    encoded = {}
+    for tier in tiers:
+        quality, scale = QUALITY_TIERS[tier]
+        image = annotated if scale == 1.0 else cv2.resize(
+            annotated, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+        ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if ok:
+            encoded[tier] = jpeg.tobytes()
+    return encoded
+
+class LiveStream:
+    """Ticks one camera captured on this worker while it has viewers.
+
+    Each tick renders the newest captured frame once for all viewers, so
+    the annotate/encode cost depends on the number of quality tiers in use,
+    not on the number of viewers. Tiers other workers asked for through the
+    relay (`remote_tiers`) are encoded in the same pass and published.
+    """
+
+    def __init__(self, camera_id: str, video_manager, executor: ThreadPoolExecutor, fps: float, relay=None):
+        self.camera_id = camera_id
+        self.video_manager = video_manager
+        self.executor = executor
+        self.interval = 1.0 / fps
+        self.relay = relay
+        self.viewers: Set[LiveViewer] = set()
+        self.remote_tiers: Set[int] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.last_frame_id = 0
+        self.frames_rendered = 0
+        self.encodes = 0
+        self.render_seconds = 0.0
+
+    @property
+    def idle(self) -> bool:
+        return not self.viewers and not self.remote_tiers
+
+    def add(self, viewer: LiveViewer):
+        self.viewers.add(viewer)
+        self._ensure_running()
+
+    def set_remote_tiers(self, tiers: Set[int]):
+        self.remote_tiers = tiers
+        if tiers:
+            self._ensure_running()
+
+    def _ensure_running(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def remove(self, viewer: LiveViewer):
+        self.viewers.discard(viewer)
+
+    def close(self):
+        for viewer in self.viewers:
+            viewer.put(None)
+        self.viewers.clear()
+        self.remote_tiers = set()
+        if self.task:
+            self.task.cancel()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.idle:
+                started = loop.time()
+                # Re-resolved every tick so a restarted processor is picked up
+                processor = self.video_manager.get_processor(self.camera_id)
+                if processor is None:
+                    logger.info(f"Camera {self.camera_id} stopped, ending live view")
+                    self.close()
+                    return
+
+                frame_id, frame = processor.get_latest_frame()
+                if frame is not None and frame_id != self.last_frame_id:
+                    self.last_frame_id = frame_id
+                    viewers = list(self.viewers)
+                    for viewer in viewers:
+                        viewer.adapt()
+                    remote_tiers = self.remote_tiers
+                    tiers = {viewer.tier for viewer in viewers} | remote_tiers
+                    encoded = await loop.run_in_executor(self.executor, render_frame, frame, processor, tiers)
+                    self.frames_rendered += 1
+                    self.encodes += len(encoded)
+                    self.render_seconds += loop.time() - started
+                    for viewer in viewers:
+                        if viewer.tier in encoded:
+                            viewer.put(encoded[viewer.tier])
+                    if self.relay is not None:
+                        await self._publish(encoded, remote_tiers)
+
+                await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Live view for camera {self.camera_id} failed: {e}")
+            self.close()
+
+    async def _publish(self, encoded: Dict[int, bytes], tiers: Set[int]):
+        for tier in tiers:
+            if tier in encoded:
+                try:
+                    await self.relay.publish(self.camera_id, tier, encoded[tier])
+                except Exception as e:
+                    logger.error(f"Error relaying live view of camera {self.camera_id}: {e}")
+                    return
+
+    def get_metrics(self) -> Dict:
+        return {
+            "viewers": [viewer.get_metrics() for viewer in self.viewers],
+            "remote_tiers": sorted(self.remote_tiers),
+            "frames_rendered": self.frames_rendered,
+            "encodes": self.encodes,
+            "avg_render_ms": round(self.render_seconds / self.frames_rendered * 1000, 1) if self.frames_rendered else None
+        }
+
+class RelayedStream:
+    """Live view of a camera captured on another worker, fed by the relay.
+
+    The capturing worker encodes; this worker only forwards each published
+    frame to its viewers of that tier, and asks for the tiers they need.
+    """
+
+    def __init__(self, camera_id: str, relay):
+        self.camera_id = camera_id
+        self.relay = relay
+        self.viewers: Set[LiveViewer] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.frames_received = 0
+
+    @property
+    def idle(self) -> bool:
+        return not self.viewers
+
+    def tiers(self) -> Set[int]:
+        return {viewer.tier for viewer in self.viewers}
+
+    def add(self, viewer: LiveViewer):
+        self.viewers.add(viewer)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def remove(self, viewer: LiveViewer):
+        self.viewers.discard(viewer)
+
+    def close(self):
+        for viewer in self.viewers:
+            viewer.put(None)
+        self.viewers.clear()
+        if self.task:
+            self.task.cancel()
+
+    async def _run(self):
+        frames = self.relay.frames(self.camera_id)
+        try:
+            while self.viewers:
+                tier, jpeg = await asyncio.wait_for(frames.__anext__(), LIVE_VIEW_RELAY_TIMEOUT)
+                self.frames_received += 1
+                for viewer in list(self.viewers):
+                    if viewer.tier == tier:
+                        viewer.adapt()
+                        viewer.put(jpeg)
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            logger.info(f"No relayed frames for camera {self.camera_id}, ending live view")
+            self.close()
+        except Exception as e:
+            logger.error(f"Relayed live view for camera {self.camera_id} failed: {e}")
+            self.close()
+        finally:
+            await frames.aclose()
+
+    def get_metrics(self) -> Dict:
+        return {
+            "viewers": [viewer.get_metrics() for viewer in self.viewers],
+            "relayed": True,
+            "frames_received": self.frames_received
+        }
+
+class LiveViewHub:
+    """Live annotated video for every camera, captured here or relayed.
+
+    Without a relay only cameras processed on this worker can be watched.
+    With one, the capturing worker publishes the tiers other workers ask
+    for, so a live view can be served by any API worker.
+    """
+
+    def __init__(self, video_manager, fps: float = LIVE_VIEW_FPS, max_viewers: int = LIVE_VIEW_MAX_VIEWERS, encode_workers: int = 2, relay=None):
+        self.video_manager = video_manager
+        self.fps = fps
+        self.max_viewers = max_viewers
+        self.relay = relay
+        self.executor = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="live-view")
+        self.streams: Dict[str, object] = {}
+        self.relay_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.relay is not None:
+            self.relay_task = asyncio.create_task(self._relay_loop())
+
+    async def subscribe(self, camera_id: str) -> LiveViewer:
+        local = self.video_manager.get_processor(camera_id) is not None
+        if not local and not await self._captured_elsewhere(camera_id):
+            raise LiveViewUnavailable(f"Camera {camera_id} is not being captured")
+
+        stream = self.streams.get(camera_id)
+        if stream is None or (stream.idle and isinstance(stream, LiveStream) != local):
+            if stream is not None:
+                stream.close()
+            if local:
+                stream = LiveStream(camera_id, self.video_manager, self.executor, self.fps, self.relay)
+            else:
+                stream = RelayedStream(camera_id, self.relay)
+            self.streams[camera_id] = stream
+        if len(stream.viewers) >= self.max_viewers:
+            raise LiveViewUnavailable(f"Camera {camera_id} already has {self.max_viewers} live viewers")
+
+        viewer = LiveViewer(camera_id)
+        stream.add(viewer)
+        if isinstance(stream, RelayedStream):
+            # Ask right away rather than at the next relay round
+            try:
+                await self.relay.request(camera_id, stream.tiers())
+            except Exception as e:
+                logger.error(f"Error requesting relayed live view of camera {camera_id}: {e}")
+        return viewer
+
+    async def _captured_elsewhere(self, camera_id: str) -> bool:
+        if self.relay is None:
+            return False
+        try:
+            return await self.relay.is_captured(camera_id)
+        except Exception as e:
+            logger.error(f"Error checking live view relay for camera {camera_id}: {e}")
+            return False
+
+    def unsubscribe(self, viewer: LiveViewer):
+        stream = self.streams.get(viewer.camera_id)
+        if stream:
+            stream.remove(viewer)
+            if stream.idle:
+                stream.close()
+                del self.streams[viewer.camera_id]
+
+    async def _relay_loop(self):
+        """Announce captured cameras, serve remote demand and renew this worker's own requests"""
+        while True:
+            await asyncio.sleep(self.relay.ttl / 3)
+            try:
+                captured = self.video_manager.get_active_cameras()
+                if captured:
+                    await self.relay.announce(captured)
+                remote = await self.relay.remote_tiers(captured) if captured else {}
+                for camera_id in captured:
+                    tiers = remote.get(camera_id, set())
+                    stream = self.streams.get(camera_id)
+                    if stream is None and tiers:
+                        stream = self.streams[camera_id] = LiveStream(
+                            camera_id, self.video_manager, self.executor, self.fps, self.relay
+                        )
+                    if isinstance(stream, LiveStream):
+                        stream.set_remote_tiers(tiers)
+
+                for camera_id, stream in list(self.streams.items()):
+                    if stream.idle:
+                        stream.close()
+                        del self.streams[camera_id]
+                    elif isinstance(stream, RelayedStream):
+                        await self.relay.request(camera_id, stream.tiers())
+            except Exception as e:
+                logger.error(f"Live view relay round failed: {e}")
+
+    async def mjpeg(self, viewer: LiveViewer) -> AsyncIterator[bytes]:
+        """multipart/x-mixed-replace body for <img> tags and plain HTTP clients"""
+        try:
+            while True:
+                jpeg = await viewer.next_frame()
+                if jpeg is None:
+                    break
+                yield (
+                    f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg + b"\r\n"
+                )
+        finally:
+            self.unsubscribe(viewer)
+
+    async def stop(self):
+        if self.relay_task:
+            self.relay_task.cancel()
+        for stream in self.streams.values():
+            stream.close()
+        self.streams.clear()
+        self.executor.shutdown(wait=False)
+        if self.relay is not None:
+            await self.relay.close()
+
+    def get_metrics(self, camera_ids: Iterable[str]) -> Dict:
+        return {
+            camera_id: self.streams[camera_id].get_metrics()
+            for camera_id in camera_ids if camera_id in self.streams
+        }
+
+# Global live view hub instance
+live_view = LiveViewHub(
+    video_manager,
+    encode_workers=int(os.getenv("LIVE_VIEW_ENCODE_WORKERS", "2")),
+    relay=create_live_relay(os.getenv("LIVE_VIEW_RELAY_BACKEND", "memory"), os.getenv("REDIS_URL"))
+)
@@ -1,16 +1,21 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, status, Request, Response
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
 import uvicorn
 from typing import Optional, List
 from datetime import datetime, timedelta
 import logging
 import json
 import os
+import asyncio
+import uuid
 
 # Configure logging
 logging.basicConfig(
@@ -19,23 +24,67 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+EVENT_BATCH_MAX_ITEMS = int(os.getenv("EVENT_BATCH_MAX_ITEMS", "5000"))
+PARTITION_MAINTENANCE_INTERVAL = 24 * 60 * 60  # seconds
+ENABLE_DEMO_USERS = os.getenv("ENABLE_DEMO_USERS", "false").lower() == "true"
+RETENTION_INTERVAL = int(os.getenv("RETENTION_INTERVAL", str(24 * 60 * 60)))  # seconds
+VIDEO_PROCESSING_ENABLED = os.getenv("VIDEO_PROCESSING_ENABLED", "false").lower() == "true"
+TREND_PERIODS = {"day": (1, "hour"), "week": (7, "day"), "month": (30, "day")}  # days, granularity
+
 # Database and models  
-from .database import engine, Base, get_db, init_db, check_db_connection
+from .database import engine, Base, get_async_db, get_async_read_db, init_db, check_db_connection, check_async_db_connection
+from .database import AsyncSessionLocal, AsyncReadSessionLocal
 from .models import User, Tenant, Camera, Person, Vehicle, Event
 from .auth import (
-    create_access_token, get_current_user, get_current_active_user,
-    require_admin, require_admin_or_security, require_any_role
+    create_access_token, authenticate_user, get_current_user, get_current_active_user,
+    require_admin, require_admin_or_security, require_any_role,
+    create_stream_token, authenticate_live_view, STREAM_TOKEN_EXPIRE_SECONDS
 )
 from .websocket_manager import manager
+from .event_bus import event_bus, ALERT_EVENT_TYPES
+from .video_manager import video_manager
+from .video_ownership import run_video_processing, request_video_sync
+from .live_view import live_view, LiveViewUnavailable, MJPEG_BOUNDARY
+from .partitions import ensure_event_partitions
+from .retention import enforce_retention, get_archive_stats, read_archived_events
+from .pagination import parse_cursor, set_next_cursor, NEXT_CURSOR_HEADER
+from .cache import dashboard_cache
+from .principal_cache import principal_cache
+from .password_hasher import password_hasher, PasswordHasherBusy
+from .query_compiler import compile_query
+from .event_export import EXPORT_FORMATS, export_events, export_filename, parquet_available
 from .crud import user as crud_user, camera as crud_camera, person as crud_person, vehicle as crud_vehicle, event as crud_event
+from .crud import event_rollup as crud_rollup
+from .crud import retention_policy as crud_retention
 from schemas import (
     UserCreate, UserResponse, LoginRequest, LoginResponse,
     CameraCreate, CameraResponse, CameraUpdate,
     PersonCreate, PersonResponse, PersonUpdate,
     VehicleCreate, VehicleResponse, VehicleUpdate,
-    EventCreate, EventResponse
+    EventCreate, EventResponse, EventBatchResponse,
+    RetentionPolicyUpdate, RetentionPolicyResponse
 )
 
+async def maintain_event_partitions():
+    """Keep upcoming monthly event partitions created while the app runs"""
+    while True:
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL)
+        try:
+            await asyncio.to_thread(ensure_event_partitions, engine)
+        except Exception as e:
+            logger.error(f"Event partition maintenance failed: {e}")
+
+async def enforce_event_retention():
+    """Archive and delete events past each tenant's retention period"""
+    while True:
+        await asyncio.sleep(RETENTION_INTERVAL)
+        try:
+            archived = await asyncio.to_thread(enforce_retention)
+            if archived:
+                logger.info(f"Event retention archived: {archived}")
+        except Exception as e:
+            logger.error(f"Event retention failed: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize database
@@ -48,7 +97,30 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize database: {e}")
         raise
     
+    # Relay WebSocket broadcasts between workers before anything publishes
+    await manager.start()
+    
+    # Start the batched event writer; it broadcasts back onto this loop
+    event_bus.start(asyncio.get_running_loop())
+    partition_task = asyncio.create_task(maintain_event_partitions())
+    retention_task = asyncio.create_task(enforce_event_retention())
+    
+    # One worker captures and analyses the cameras; see run_video_processing
+    live_view.start()
+    video_task = asyncio.create_task(run_video_processing()) if VIDEO_PROCESSING_ENABLED else None
+    
     yield
+    partition_task.cancel()
+    retention_task.cancel()
+    await live_view.stop()
+    if video_task:
+        video_task.cancel()
+        await asyncio.gather(video_task, return_exceptions=True)
+    # Processors flush pending events on stop, so the bus stops after them
+    await asyncio.to_thread(video_manager.stop_all)
+    event_bus.stop()
+    await manager.stop()
+    password_hasher.shutdown()
     logger.info("Application shutdown")
 
 app = FastAPI(
@@ -65,6 +137,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination returns the next cursor in a response header
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Add security middleware
@@ -81,7 +155,7 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    db_status = check_db_connection()
+    db_status = await check_async_db_connection()
     return {
         "status": "healthy" if db_status else "unhealthy",
         "database": "connected" if db_status else "disconnected",
@@ -94,19 +168,62 @@ async def websocket_endpoint(websocket: WebSocket, tenant_id: str, user_id: str)
     await manager.connect(websocket, tenant_id, user_id)
     try:
         while True:
+            # Control messages are JSON text whatever encoding the socket negotiated
             data = await websocket.receive_text()
             # Handle incoming WebSocket messages
-            message_data = json.loads(data)
+            try:
+                message_data = json.loads(data)
+            except ValueError:
+                message_data = None
+            if not isinstance(message_data, dict):
+                await manager.send(websocket, {"type": "error", "message": "Expected a JSON object"}, tenant_id)
+                continue
             
             if message_data.get("type") == "ping":
-                await websocket.send_text(json.dumps({"type": "pong"}))
+                await manager.send(websocket, {"type": "pong"}, tenant_id)
+            
+            # Server-side filters: {"type": "subscribe", "camera_ids": [...], "event_types": [...]}
+            elif message_data.get("type") in ("subscribe", "unsubscribe"):
+                try:
+                    subscription = manager.update_subscription(
+                        websocket, tenant_id,
+                        subscribe=message_data["type"] == "subscribe",
+                        camera_ids=message_data.get("camera_ids"),
+                        event_types=message_data.get("event_types")
+                    )
+                except ValueError as e:
+                    # Bad filters are answered, not fatal to the socket
+                    await manager.send(websocket, {"type": "error", "message": str(e)}, tenant_id)
+                    continue
+                await manager.send(websocket, {
+                    "type": "subscription",
+                    "data": subscription
+                }, tenant_id)
             
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Also reached when the manager evicted this socket as a slow consumer
         manager.disconnect(websocket, tenant_id, user_id)
 
 # Authentication endpoints
 @app.post("/api/v1/auth/login", response_model=LoginResponse)
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    # Registered users: bcrypt runs on the password hasher pool, not the event loop
+    try:
+        db_user = await authenticate_user(db, request.email, request.password)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, please retry",
+            headers={"Retry-After": "1"}
+        )
+    if db_user and not db_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    
     # Demo authentication - replace with actual authentication
     demo_users = {
         "admin@demo.com": {
@@ -132,8 +249,18 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
         }
     }
     
-    user_data = demo_users.get(request.email)
-    if user_data and user_data["password"] == request.password:
+    user_data = demo_users.get(request.email) if ENABLE_DEMO_USERS else None
+    if db_user:
+        user_data = {
+            "id": str(db_user.id),
+            "full_name": db_user.full_name,
+            "role": db_user.role,
+            "tenant_id": str(db_user.tenant_id)
+        }
+    elif user_data and user_data["password"] != request.password:
+        user_data = None
+    
+    if user_data:
         access_token_expires = timedelta(minutes=30)
         access_token = create_access_token(
             data={
@@ -164,19 +291,29 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
 @app.post("/api/v1/auth/register", response_model=UserResponse)
 async def register(
     user: UserCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
     # Check if user already exists
-    existing_user = crud_user.get_user_by_email(db, user.email, current_user.tenant_id)
+    existing_user = await db.run_sync(
+        crud_user.get_user_by_email, user.email, current_user.tenant_id
+    )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    db_user = crud_user.create_user(db, user, current_user.tenant_id)
+    # Create new user, hashing the password off the event loop
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is busy, please retry",
+            headers={"Retry-After": "1"}
+        )
+    db_user = await db.run_sync(crud_user.create_user, user, current_user.tenant_id, hashed_password)
     return UserResponse(
         id=str(db_user.id),
         email=db_user.email,
@@ -188,12 +325,17 @@ async def register(
 # Camera endpoints
 @app.get("/api/v1/cameras", response_model=List[CameraResponse])
 async def get_cameras(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(require_any_role)
 ):
-    cameras = crud_camera.get_cameras(db, current_user.tenant_id, skip, limit)
+    cameras = await db.run_sync(
+        crud_camera.get_cameras, current_user.tenant_id, skip, limit, parse_cursor(cursor)
+    )
+    set_next_cursor(response, cameras, limit)
     return [CameraResponse(
         id=str(camera.id),
         name=camera.name,
@@ -207,10 +349,11 @@ async def get_cameras(
 @app.post("/api/v1/cameras", response_model=CameraResponse)
 async def create_camera(
     camera: CameraCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin_or_security)
 ):
-    db_camera = crud_camera.create_camera(db, camera, current_user.tenant_id)
+    db_camera = await db.run_sync(crud_camera.create_camera, camera, current_user.tenant_id)
+    request_video_sync()
     
     # Broadcast camera creation
     await manager.broadcast_camera_status({
@@ -236,15 +379,16 @@ async def create_camera(
 async def update_camera(
     camera_id: str,
     camera_update: CameraUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin_or_security)
 ):
-    db_camera = crud_camera.update_camera(db, camera_id, camera_update)
+    db_camera = await db.run_sync(crud_camera.update_camera, camera_id, camera_update)
     if not db_camera:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Camera not found"
         )
+    request_video_sync()
     
     # Broadcast camera update
     await manager.broadcast_camera_status({
@@ -269,15 +413,16 @@ async def update_camera(
 @app.delete("/api/v1/cameras/{camera_id}")
 async def delete_camera(
     camera_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
-    success = crud_camera.delete_camera(db, camera_id)
+    success = await db.run_sync(crud_camera.delete_camera, camera_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Camera not found"
         )
+    request_video_sync()
     
     # Broadcast camera deletion
     await manager.broadcast_camera_status({
@@ -287,15 +432,109 @@ async def delete_camera(
     
     return {"message": "Camera deleted successfully"}
 
+# Live view endpoints
+async def _get_camera(camera_id: str) -> Optional[Camera]:
+    # Own short-lived session: live streams run far longer than a request dependency should hold one
+    async with AsyncReadSessionLocal() as db:
+        return await db.run_sync(crud_camera.get_camera, camera_id)
+
+async def _get_tenant_camera(camera_id: str, tenant_id: str) -> Optional[Camera]:
+    camera = await _get_camera(camera_id)
+    if camera and str(camera.tenant_id) == str(tenant_id):
+        return camera
+    return None
+
+@app.post("/api/v1/cameras/{camera_id}/live/token")
+async def create_live_view_token(camera_id: str, current_user: User = Depends(require_any_role)):
+    """Short-lived signed URL for the live view, usable where no Authorization header can be sent"""
+    if not await _get_tenant_camera(camera_id, current_user.tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Camera not found"
+        )
+    token = create_stream_token(current_user.id, str(current_user.tenant_id), camera_id)
+    return {
+        "token": token,
+        "expires_in": STREAM_TOKEN_EXPIRE_SECONDS,
+        "mjpeg_url": f"/api/v1/cameras/{camera_id}/live?token={token}",
+        "websocket_url": f"/ws/{current_user.tenant_id}/cameras/{camera_id}/live?token={token}"
+    }
+
+@app.get("/api/v1/cameras/{camera_id}/live")
+async def live_view_mjpeg(camera_id: str, token: str):
+    """Annotated MJPEG stream; with a token from POST .../live/token it plays in an <img> tag"""
+    camera = await _get_camera(camera_id)
+    if not camera or not await authenticate_live_view(token, str(camera.tenant_id), camera_id):
+        # Same answer for unknown cameras and bad tokens, so ids cannot be probed
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Camera not found"
+        )
+    try:
+        viewer = await live_view.subscribe(camera_id)
+    except LiveViewUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    
+    return StreamingResponse(
+        live_view.mjpeg(viewer),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        # JPEG does not compress further; the explicit encoding keeps GZipMiddleware out of the way
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"}
+    )
+
+@app.websocket("/ws/{tenant_id}/cameras/{camera_id}/live")
+async def live_view_websocket(websocket: WebSocket, tenant_id: str, camera_id: str, token: Optional[str] = None):
+    """Annotated live view as one binary JPEG message per frame.
+
+    Browsers cannot set headers on WebSockets, so the caller passes a stream
+    token from POST .../live/token as `?token=`; its tenant must be `tenant_id`.
+    """
+    if (
+        not await authenticate_live_view(token, tenant_id, camera_id)
+        or not await _get_tenant_camera(camera_id, tenant_id)
+    ):
+        await websocket.close(code=1008)
+        return
+    try:
+        viewer = await live_view.subscribe(camera_id)
+    except LiveViewUnavailable:
+        await websocket.close(code=1013)
+        return
+    
+    await websocket.accept()
+    try:
+        while True:
+            jpeg = await viewer.next_frame()
+            if jpeg is None:
+                break
+            await websocket.send_bytes(jpeg)
+    except Exception as e:
+        # Viewers never send, so a failed send is how a disconnect shows up
+        logger.info(f"Live viewer of camera {camera_id} disconnected: {e}")
+    finally:
+        live_view.unsubscribe(viewer)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
 # Person endpoints
 @app.get("/api/v1/persons", response_model=List[PersonResponse])
 async def get_persons(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(require_any_role)
 ):
-    persons = crud_person.get_persons(db, current_user.tenant_id, skip, limit)
+    persons = await db.run_sync(
+        crud_person.get_persons, current_user.tenant_id, skip, limit, parse_cursor(cursor)
+    )
+    set_next_cursor(response, persons, limit)
     return [PersonResponse(
         id=str(person.id),
         name=person.name,
@@ -309,12 +548,12 @@ async def get_persons(
 @app.post("/api/v1/persons", response_model=PersonResponse)
 async def create_person(
     person: PersonCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin_or_security)
 ):
     # Check if employee ID already exists
-    existing_person = crud_person.get_person_by_employee_id(
-        db, person.employee_id, current_user.tenant_id
+    existing_person = await db.run_sync(
+        crud_person.get_person_by_employee_id, person.employee_id, current_user.tenant_id
     )
     if existing_person:
         raise HTTPException(
@@ -322,7 +561,8 @@ async def create_person(
             detail="Employee ID already exists"
         )
     
-    db_person = crud_person.create_person(db, person, current_user.tenant_id)
+    db_person = await db.run_sync(crud_person.create_person, person, current_user.tenant_id)
+    request_video_sync()
     return PersonResponse(
         id=str(db_person.id),
         name=db_person.name,
@@ -337,15 +577,16 @@ async def create_person(
 async def update_person(
     person_id: str,
     person_update: PersonUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin_or_security)
 ):
-    db_person = crud_person.update_person(db, person_id, person_update)
+    db_person = await db.run_sync(crud_person.update_person, person_id, person_update)
     if not db_person:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Person not found"
         )
+    request_video_sync()
     
     return PersonResponse(
         id=str(db_person.id),
@@ -360,27 +601,33 @@ async def update_person(
 @app.delete("/api/v1/persons/{person_id}")
 async def delete_person(
     person_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
-    success = crud_person.delete_person(db, person_id)
+    success = await db.run_sync(crud_person.delete_person, person_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Person not found"
         )
+    request_video_sync()
     
     return {"message": "Person deleted successfully"}
 
 # Vehicle endpoints
 @app.get("/api/v1/vehicles", response_model=List[VehicleResponse])
 async def get_vehicles(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(require_any_role)
 ):
-    vehicles = crud_vehicle.get_vehicles(db, current_user.tenant_id, skip, limit)
+    vehicles = await db.run_sync(
+        crud_vehicle.get_vehicles, current_user.tenant_id, skip, limit, parse_cursor(cursor)
+    )
+    set_next_cursor(response, vehicles, limit)
     return [VehicleResponse(
         id=str(vehicle.id),
         license_plate=vehicle.license_plate,
@@ -394,12 +641,12 @@ async def get_vehicles(
 @app.post("/api/v1/vehicles", response_model=VehicleResponse)
 async def create_vehicle(
     vehicle: VehicleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin_or_security)
 ):
     # Check if license plate already exists
-    existing_vehicle = crud_vehicle.get_vehicle_by_license_plate(
-        db, vehicle.license_plate, current_user.tenant_id
+    existing_vehicle = await db.run_sync(
+        crud_vehicle.get_vehicle_by_license_plate, vehicle.license_plate, current_user.tenant_id
     )
     if existing_vehicle:
         raise HTTPException(
@@ -407,7 +654,7 @@ async def create_vehicle(
             detail="License plate already exists"
         )
     
-    db_vehicle = crud_vehicle.create_vehicle(db, vehicle, current_user.tenant_id)
+    db_vehicle = await db.run_sync(crud_vehicle.create_vehicle, vehicle, current_user.tenant_id)
     return VehicleResponse(
         id=str(db_vehicle.id),
         license_plate=db_vehicle.license_plate,
@@ -422,10 +669,10 @@ async def create_vehicle(
 async def update_vehicle(
     vehicle_id: str,
     vehicle_update: VehicleUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin_or_security)
 ):
-    db_vehicle = crud_vehicle.update_vehicle(db, vehicle_id, vehicle_update)
+    db_vehicle = await db.run_sync(crud_vehicle.update_vehicle, vehicle_id, vehicle_update)
     if not db_vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -445,10 +692,10 @@ async def update_vehicle(
 @app.delete("/api/v1/vehicles/{vehicle_id}")
 async def delete_vehicle(
     vehicle_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
-    success = crud_vehicle.delete_vehicle(db, vehicle_id)
+    success = await db.run_sync(crud_vehicle.delete_vehicle, vehicle_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -460,33 +707,57 @@ async def delete_vehicle(
 # Event endpoints
 @app.get("/api/v1/events", response_model=List[EventResponse])
 async def get_events(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     event_type: Optional[str] = None,
     camera_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    person_id: Optional[str] = None,
+    license_plate: Optional[str] = None,
+    zone_name: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    include_archived: bool = False,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(require_any_role)
 ):
-    events = crud_event.get_events(
-        db, current_user.tenant_id, skip, limit, event_type, camera_id
+    cursor = parse_cursor(cursor)
+    archived = None
+    if include_archived:
+        # The Parquet scan runs on a worker thread, outside the DB session
+        archived = await asyncio.to_thread(
+            read_archived_events, current_user.tenant_id, skip + limit, event_type, camera_id,
+            start_date, end_date, cursor, person_id, license_plate, zone_name
+        )
+    events = await db.run_sync(
+        crud_event.get_events, current_user.tenant_id, skip, limit, event_type, camera_id,
+        start_date=start_date,
+        end_date=end_date,
+        cursor=cursor,
+        person_id=person_id,
+        license_plate=license_plate,
+        zone_name=zone_name,
+        archived=archived
     )
+    set_next_cursor(response, events, limit)
     return [EventResponse(
         id=str(event.id),
         event_type=event.event_type,
         description=event.description,
         camera_id=str(event.camera_id),
         confidence=event.confidence,
-        metadata=event.metadata,
+        metadata=event.event_metadata,
         created_at=event.created_at
     ) for event in events]
 
 @app.post("/api/v1/events", response_model=EventResponse)
 async def create_event(
     event: EventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_any_role)
 ):
-    db_event = crud_event.create_event(db, event, current_user.tenant_id)
+    db_event = await db.run_sync(crud_event.create_event, event, current_user.tenant_id)
     
     # Broadcast event to connected clients
     await manager.broadcast_event({
@@ -504,86 +775,330 @@ async def create_event(
         description=db_event.description,
         camera_id=str(db_event.camera_id),
         confidence=db_event.confidence,
-        metadata=db_event.metadata,
+        metadata=db_event.event_metadata,
         created_at=db_event.created_at
     )
 
+async def _read_event_batch(request: Request) -> List[EventCreate]:
+    """Parse a JSON array or an NDJSON stream of events from the request body"""
+    content_type = request.headers.get("content-type", "")
+    
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            items.extend(json.loads(line) for line in lines if line.strip())
+            if len(items) > EVENT_BATCH_MAX_ITEMS:
+                break
+        if buffer.strip():
+            items.append(json.loads(buffer))
+    else:
+        items = json.loads(await request.body())
+        if not isinstance(items, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a JSON array of events"
+            )
+    
+    if len(items) > EVENT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {EVENT_BATCH_MAX_ITEMS} events"
+        )
+    
+    events = []
+    for index, item in enumerate(items):
+        try:
+            events.append(EventCreate(**item))
+        except (ValidationError, TypeError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid event at index {index}: {e}"
+            )
+    return events
+
+@app.post("/api/v1/events/batch", response_model=EventBatchResponse)
+async def create_events_batch(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_any_role)
+):
+    try:
+        events = await _read_event_batch(request)
+    except json.JSONDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Malformed JSON: {e}"
+        )
+    
+    if not events:
+        return EventBatchResponse(ids=[], count=0)
+    
+    # Unknown or other-tenant cameras would fail the whole INSERT on its foreign key
+    camera_ids = {}
+    for event in events:
+        try:
+            camera_ids.setdefault(event.camera_id, str(uuid.UUID(event.camera_id)))
+        except ValueError:
+            camera_ids.setdefault(event.camera_id, None)
+    known = await db.run_sync(
+        crud_camera.filter_tenant_camera_ids, current_user.tenant_id,
+        {uuid.UUID(camera_id) for camera_id in camera_ids.values() if camera_id}
+    )
+    invalid = [index for index, event in enumerate(events) if camera_ids[event.camera_id] not in known]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Unknown camera_id", "indexes": invalid}
+        )
+    
+    rows = await db.run_sync(crud_event.create_events_bulk, events, current_user.tenant_id)
+    
+    # Broadcast the whole batch as a single WebSocket message
+    await manager.broadcast_events([
+        {
+            "id": row["id"],
+            "event_type": row["event_type"],
+            "description": row["description"],
+            "camera_id": str(row["camera_id"]),
+            "confidence": row["confidence"],
+            "created_at": row["created_at"].isoformat()
+        }
+        for row in rows
+    ], current_user.tenant_id)
+    
+    return EventBatchResponse(ids=[row["id"] for row in rows], count=len(rows))
+
 @app.get("/api/v1/events/search")
 async def search_events(
     q: str,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(require_any_role)
 ):
-    events = crud_event.search_events(db, current_user.tenant_id, q, limit)
+    events = await db.run_sync(
+        crud_event.natural_language_search, current_user.tenant_id, q, limit, start_date, end_date
+    )
     return [EventResponse(
         id=str(event.id),
         event_type=event.event_type,
         description=event.description,
         camera_id=str(event.camera_id),
         confidence=event.confidence,
-        metadata=event.metadata,
+        metadata=event.event_metadata,
         created_at=event.created_at
     ) for event in events]
 
+@app.get("/api/v1/events/search/parse")
+async def parse_event_search(
+    q: str,
+    current_user: User = Depends(require_any_role)
+):
+    # Show how a natural-language query is interpreted, without running it
+    return compile_query(q).to_dict()
+
+@app.get("/api/v1/events/export")
+async def export_events_stream(
+    format: str = "ndjson",
+    event_type: Optional[str] = None,
+    camera_id: Optional[str] = None,
+    person_id: Optional[str] = None,
+    license_plate: Optional[str] = None,
+    zone_name: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: User = Depends(require_admin_or_security)
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow"
+        )
+    
+    # Rows are read through a server-side cursor and written chunk by chunk
+    chunks = export_events(
+        current_user.tenant_id, format,
+        event_type=event_type,
+        camera_id=camera_id,
+        person_id=person_id,
+        license_plate=license_plate,
+        zone_name=zone_name,
+        start_date=start_date,
+        end_date=end_date
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[format][0],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(format)}"'}
+    )
+
 # Dashboard endpoints
+def _load_dashboard_stats(db: Session, tenant_id: str) -> tuple:
+    return (
+        crud_camera.count_cameras(db, tenant_id),
+        crud_camera.count_active_cameras(db, tenant_id),
+        crud_person.count_persons(db, tenant_id),
+        crud_vehicle.count_vehicles(db, tenant_id),
+        crud_event.get_recent_events(db, tenant_id, 24, 5),
+        crud_event.get_events_count_by_type(db, tenant_id, 24),
+        crud_rollup.get_event_trends(db, tenant_id, days=7)
+    )
+
 @app.get("/api/v1/dashboard")
 async def get_dashboard_data(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(require_any_role)
 ):
-    # Get statistics
-    cameras = crud_camera.get_cameras(db, current_user.tenant_id)
-    active_cameras = crud_camera.get_active_cameras(db, current_user.tenant_id)
-    persons = crud_person.get_persons(db, current_user.tenant_id)
-    vehicles = crud_vehicle.get_vehicles(db, current_user.tenant_id)
-    recent_events = crud_event.get_recent_events(db, current_user.tenant_id, 24, 10)
-    event_counts = crud_event.get_events_count_by_type(db, current_user.tenant_id, 24)
+    async def load_dashboard() -> dict:
+        # Get statistics as SQL-side counts, in a single trip onto the async session
+        (
+            total_cameras, active_cameras, total_persons, total_vehicles,
+            recent_events, event_counts, chart_data
+        ) = await db.run_sync(_load_dashboard_stats, current_user.tenant_id)
     
-    # Calculate alerts (high-priority events)
-    alerts = len([e for e in recent_events if e.event_type in ['intrusion', 'unauthorized_access']])
+        # Calculate alerts (high-priority events)
+        alerts = sum(event_counts.get(event_type, 0) for event_type in ALERT_EVENT_TYPES)
+    
+        dashboard = {
+            "stats": {
+                "totalCameras": total_cameras,
+                "activeCameras": active_cameras,
+                "totalPersons": total_persons,
+                "totalVehicles": total_vehicles,
+                "todayEvents": sum(event_counts.values()),
+                "alerts": alerts
+            },
+            "eventCounts": event_counts,
+            "recentEvents": [
+                {
+                    "id": str(event.id),
+                    "type": "alert" if event.event_type in ALERT_EVENT_TYPES else "detection",
+                    "message": event.description,
+                    "camera": f"Camera {event.camera_id}",
+                    "timestamp": event.created_at.isoformat(),
+                    "status": "pending" if event.event_type in ALERT_EVENT_TYPES else "resolved"
+                }
+                for event in recent_events
+            ],
+            "chartData": chart_data
+        }
+        return dashboard
     
+    # Concurrent misses for a tenant share one load instead of stampeding
+    # Replica loads right after an invalidation are served but not cached
+    return await dashboard_cache.get_or_load(
+        current_user.tenant_id, load_dashboard, from_replica=lambda: "replica" in db.info
+    )
+
+@app.get("/api/v1/dashboard/trends")
+async def get_dashboard_trends(
+    period: str = "week",
+    camera_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(require_any_role)
+):
+    if period not in TREND_PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"period must be one of: {', '.join(TREND_PERIODS)}"
+        )
+    
+    days, granularity = TREND_PERIODS[period]
     return {
-        "stats": {
-            "totalCameras": len(cameras),
-            "activeCameras": len(active_cameras),
-            "totalPersons": len(persons),
-            "totalVehicles": len(vehicles),
-            "todayEvents": len(recent_events),
-            "alerts": alerts
-        },
-        "recentEvents": [
-            {
-                "id": str(event.id),
-                "type": "alert" if event.event_type in ['intrusion', 'unauthorized_access'] else "detection",
-                "message": event.description,
-                "camera": f"Camera {event.camera_id}",
-                "timestamp": event.created_at.isoformat(),
-                "status": "pending" if event.event_type in ['intrusion', 'unauthorized_access'] else "resolved"
-            }
-            for event in recent_events[:5]
-        ],
-        "chartData": [
-            {"date": "2024-01-01", "detections": 45, "events": 23},
-            {"date": "2024-01-02", "detections": 52, "events": 28},
-            {"date": "2024-01-03", "detections": 38, "events": 19},
-            {"date": "2024-01-04", "detections": 67, "events": 34},
-            {"date": "2024-01-05", "detections": 71, "events": 41},
-            {"date": "2024-01-06", "detections": 58, "events": 29},
-            {"date": "2024-01-07", "detections": 63, "events": 32}
-        ]
+        "period": period,
+        "granularity": granularity,
+        "data": await db.run_sync(
+            crud_rollup.get_event_trends, current_user.tenant_id,
+            days=days, granularity=granularity, camera_id=camera_id
+        )
     }
 
+# Retention endpoints
+@app.get("/api/v1/retention-policy", response_model=RetentionPolicyResponse)
+async def get_retention_policy(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_admin)
+):
+    policy = await db.run_sync(crud_retention.get_retention_policy, current_user.tenant_id)
+    if not policy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No retention policy; events are kept indefinitely"
+        )
+    
+    return RetentionPolicyResponse(
+        tenant_id=str(policy.tenant_id),
+        retain_days=policy.retain_days,
+        last_run_at=policy.last_run_at
+    )
+
+@app.put("/api/v1/retention-policy", response_model=RetentionPolicyResponse)
+async def set_retention_policy(
+    policy_update: RetentionPolicyUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_admin)
+):
+    if policy_update.retain_days < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="retain_days must be at least 1"
+        )
+    
+    policy = await db.run_sync(
+        crud_retention.set_retention_policy, current_user.tenant_id, policy_update.retain_days
+    )
+    return RetentionPolicyResponse(
+        tenant_id=str(policy.tenant_id),
+        retain_days=policy.retain_days,
+        last_run_at=policy.last_run_at
+    )
+
+@app.delete("/api/v1/retention-policy")
+async def delete_retention_policy(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_admin)
+):
+    success = await db.run_sync(crud_retention.delete_retention_policy, current_user.tenant_id)
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Retention policy not found"
+        )
+    
+    return {"message": "Retention policy deleted successfully"}
+
 # System status endpoints
 @app.get("/api/v1/system/status")
 async def get_system_status(current_user: User = Depends(require_admin)):
     return {
-        "database": "connected" if check_db_connection() else "disconnected",
+        "database": "connected" if await check_async_db_connection() else "disconnected",
         "websocket_connections": manager.get_connection_count(current_user.tenant_id),
+        "websocket": manager.get_metrics(current_user.tenant_id),
+        "event_bus": event_bus.get_metrics(),
+        "dashboard_cache": dashboard_cache.get_stats(),
+        "principal_cache": principal_cache.get_stats(),
+        "password_hasher": password_hasher.get_metrics(),
+        "live_view": live_view.get_metrics(video_manager.get_tenant_cameras(current_user.tenant_id)),
+        "event_archive": get_archive_stats(current_user.tenant_id),
         "ai_services": "active",
         "version": "1.0.0",
         "uptime": "24h 15m"
     }
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        # Lets browsers negotiate permessage-deflate; msgpack-only deployments may turn it off to save CPU
+        ws_per_message_deflate=os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() == "true"
+    )
\ No newline at end of file
@@ -1,11 +1,10 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Float, JSON
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, Text, ForeignKey, Float, JSON, Index, Computed
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
 import uuid
 
-Base = declarative_base()
+from .database import Base
 
 class Tenant(Base):
     __tablename__ = "tenants"
@@ -57,6 +56,9 @@ class Camera(Base):
     tenant = relationship("Tenant", back_populates="cameras")
     events = relationship("Event", back_populates="camera")
 
+# Keyset pagination order: (created_at, id) newest first within a tenant
+Index("ix_cameras_tenant_id_created_at_id", Camera.tenant_id, Camera.created_at.desc(), Camera.id.desc())
+
 class Person(Base):
     __tablename__ = "persons"
     
@@ -74,6 +76,8 @@ class Person(Base):
     # Relationships
     tenant = relationship("Tenant", back_populates="persons")
 
+Index("ix_persons_tenant_id_created_at_id", Person.tenant_id, Person.created_at.desc(), Person.id.desc())
+
 class Vehicle(Base):
     __tablename__ = "vehicles"
     
@@ -90,22 +94,76 @@ class Vehicle(Base):
     # Relationships
     tenant = relationship("Tenant", back_populates="vehicles")
 
+Index("ix_vehicles_tenant_id_created_at_id", Vehicle.tenant_id, Vehicle.created_at.desc(), Vehicle.id.desc())
+
 class Event(Base):
     __tablename__ = "events"
+    # Monthly range partitions are managed by partitions.py
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     event_type = Column(String(50), nullable=False)  # face_detection, vehicle_detection, intrusion, etc.
     description = Column(Text, nullable=False)
     camera_id = Column(UUID(as_uuid=True), ForeignKey("cameras.id"), nullable=False)
     confidence = Column(Float)
-    metadata = Column(JSON)
+    event_metadata = Column("metadata", JSONB)  # "metadata" is reserved by declarative
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key, so it must be part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    # Hot metadata keys extracted into indexed columns, maintained by Postgres
+    # TEXT so an oversized metadata value can never make the INSERT fail
+    person_id = Column(Text, Computed("metadata->>'person_id'", persisted=True))
+    license_plate = Column(Text, Computed("upper(metadata->>'license_plate')", persisted=True))
+    zone_name = Column(Text, Computed("metadata->>'zone_name'", persisted=True))
+    # Full-text search document, maintained by Postgres
+    search_vector = Column(TSVECTOR, Computed(
+        "to_tsvector('english', coalesce(event_type, '') || ' ' || coalesce(description, ''))",
+        persisted=True
+    ))
     
     # Relationships
     camera = relationship("Camera", back_populates="events")
     tenant = relationship("Tenant", back_populates="events")
 
+# Every events query is scoped by tenant and ordered or ranged by created_at
+Index("ix_events_tenant_id_created_at", Event.tenant_id, Event.created_at.desc(), Event.id.desc())
+Index("ix_events_tenant_id_event_type_created_at", Event.tenant_id, Event.event_type, Event.created_at)
+Index("ix_events_tenant_id_camera_id_created_at", Event.tenant_id, Event.camera_id, Event.created_at)
+Index("ix_events_search_vector", Event.search_vector, postgresql_using="gin")
+Index("ix_events_tenant_id_person_id_created_at", Event.tenant_id, Event.person_id, Event.created_at)
+Index("ix_events_tenant_id_license_plate_created_at", Event.tenant_id, Event.license_plate, Event.created_at)
+Index("ix_events_tenant_id_zone_name_created_at", Event.tenant_id, Event.zone_name, Event.created_at)
+Index(
+    "ix_events_metadata", Event.event_metadata,
+    postgresql_using="gin", postgresql_ops={"metadata": "jsonb_path_ops"}
+)
+Index(
+    "ix_events_description_trgm", Event.description,
+    postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}
+)
+
+class EventRollup(Base):
+    __tablename__ = "event_rollups_hourly"
+    
+    # Incrementally maintained per-hour event counts for trend charts
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True)
+    camera_id = Column(UUID(as_uuid=True), ForeignKey("cameras.id"), primary_key=True)
+    event_type = Column(String(50), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # start of the hour
+    count = Column(BigInteger, nullable=False, default=0)
+
+Index("ix_event_rollups_hourly_tenant_id_bucket", EventRollup.tenant_id, EventRollup.bucket)
+
+class EventRetentionPolicy(Base):
+    __tablename__ = "event_retention_policies"
+    
+    # Events older than retain_days are archived to Parquet and deleted from the hot table
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True)
+    retain_days = Column(Integer, nullable=False)
+    last_run_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
 class VideoFootage(Base):
     __tablename__ = "video_footage"
     
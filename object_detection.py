@@ -1,7 +1,7 @@
 import cv2
 import numpy as np
 from ultralytics import YOLO
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -53,33 +53,38 @@ class ObjectDetectionService:
             logger.error(f"Error detecting objects: {e}")
             return []
     
-    def count_gunny_bags(self, frame: np.ndarray) -> int:
-        """Count gunny bags (approximated by backpacks/bags) in frame"""
-        try:
+    def detect_persons(self, frame: np.ndarray, detections: Optional[List[Dict]] = None) -> List[Dict]:
+        """Detect persons in frame, reusing detections from a previous pass if given"""
+        if detections is None:
             detections = self.detect_objects(frame)
-            gunny_bag_count = 0
-            
-            for detection in detections:
-                class_name = detection['class']
-                if class_name in self.target_objects['gunny_bag']:
-                    gunny_bag_count += 1
-            
-            return gunny_bag_count
-            
+        return [
+            detection for detection in detections
+            if detection['class'] in self.target_objects['person']
+        ]
+    
+    def detect_gunny_bags(self, frame: np.ndarray, detections: Optional[List[Dict]] = None) -> List[Dict]:
+        """Detect gunny bags (approximated by backpacks/bags) in frame"""
+        try:
+            if detections is None:
+                detections = self.detect_objects(frame)
+            return [
+                detection for detection in detections
+                if detection['class'] in self.target_objects['gunny_bag']
+            ]
+
         except Exception as e:
-            logger.error(f"Error counting gunny bags: {e}")
-            return 0
+            logger.error(f"Error detecting gunny bags: {e}")
+            return []
+
+    def count_gunny_bags(self, frame: np.ndarray) -> int:
+        """Count gunny bags (approximated by backpacks/bags) in frame"""
+        return len(self.detect_gunny_bags(frame))
     
-    def detect_intrusion(self, frame: np.ndarray, restricted_zones: List[Dict]) -> List[Dict]:
+    def detect_intrusion(self, frame: np.ndarray, restricted_zones: List[Dict],
+                         detections: Optional[List[Dict]] = None) -> List[Dict]:
         """Detect person intrusion in restricted zones"""
         try:
-            person_detections = []
-            all_detections = self.detect_objects(frame)
-            
-            # Filter for person detections
-            for detection in all_detections:
-                if detection['class'] in self.target_objects['person']:
-                    person_detections.append(detection)
+            person_detections = self.detect_persons(frame, detections)
             
             intrusions = []
             
@@ -0,0 +1,162 @@
+import math
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CentroidTracker:
+    """Lightweight centroid tracker that keeps object identities across frames"""
+
+    def __init__(self, max_distance: float = 80.0, max_missed: int = 5):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.next_track_id = 1
+
+        # track_id -> {'centroid', 'previous', 'missed', 'bounding_box'}
+        self.tracks: Dict[int, Dict] = {}
+
+    def update(self, detections: List[Dict]) -> Dict[int, Dict]:
+        """Match detections to existing tracks and return the live tracks"""
+        centroids = [self._centroid(d['bounding_box']) for d in detections]
+
+        # Greedy nearest-neighbour matching, closest pairs first
+        candidates = []
+        for track_id, track in self.tracks.items():
+            for index, centroid in enumerate(centroids):
+                distance = math.dist(track['centroid'], centroid)
+                if distance <= self.max_distance:
+                    candidates.append((distance, track_id, index))
+        candidates.sort()
+
+        matched_tracks = set()
+        matched_detections = set()
+        for distance, track_id, index in candidates:
+            if track_id in matched_tracks or index in matched_detections:
+                continue
+            track = self.tracks[track_id]
+            track['previous'] = track['centroid']
+            track['centroid'] = centroids[index]
+            track['bounding_box'] = detections[index]['bounding_box']
+            track['missed'] = 0
+            matched_tracks.add(track_id)
+            matched_detections.add(index)
+
+        # Age out tracks that were not seen in this frame
+        for track_id in list(self.tracks.keys()):
+            if track_id in matched_tracks:
+                continue
+            track = self.tracks[track_id]
+            track['previous'] = track['centroid']
+            track['missed'] += 1
+            if track['missed'] > self.max_missed:
+                del self.tracks[track_id]
+
+        # Register new tracks
+        for index, centroid in enumerate(centroids):
+            if index in matched_detections:
+                continue
+            self.tracks[self.next_track_id] = {
+                'centroid': centroid,
+                'previous': None,
+                'missed': 0,
+                'bounding_box': detections[index]['bounding_box']
+            }
+            self.next_track_id += 1
+
+        return self.tracks
+
+    def _centroid(self, bbox: Dict) -> Tuple[float, float]:
+        return ((bbox['x1'] + bbox['x2']) / 2.0, (bbox['y1'] + bbox['y2']) / 2.0)
+
+class LineCrossingCounter:
+    """Counts tracked objects crossing configured virtual lines in either direction"""
+
+    def __init__(self, lines: List[Dict], max_distance: float = 80.0, max_missed: int = 5):
+        self.tracker = CentroidTracker(max_distance=max_distance, max_missed=max_missed)
+        self.lines = [
+            {
+                'name': line.get('name', f"line_{index + 1}"),
+                'start': tuple(line['start']),
+                'end': tuple(line['end'])
+            }
+            for index, line in enumerate(lines)
+        ]
+
+        # Incremental counters: totals since start and deltas since last report
+        self.totals = {line['name']: {'in': 0, 'out': 0} for line in self.lines}
+        self.pending = {line['name']: {'in': 0, 'out': 0} for line in self.lines}
+        self.new_tracks = 0
+
+    def update(self, detections: List[Dict]) -> List[Dict]:
+        """Feed detections for one frame and return crossings that occurred"""
+        known_tracks = set(self.tracker.tracks.keys())
+        tracks = self.tracker.update(detections)
+        self.new_tracks += len(set(tracks.keys()) - known_tracks)
+
+        crossings = []
+        for track_id, track in tracks.items():
+            if track['previous'] is None or track['missed'] > 0:
+                continue
+
+            for line in self.lines:
+                direction = self._crossing_direction(
+                    track['previous'], track['centroid'], line['start'], line['end']
+                )
+                if direction:
+                    self.totals[line['name']][direction] += 1
+                    self.pending[line['name']][direction] += 1
+                    crossings.append({
+                        'track_id': track_id,
+                        'line_name': line['name'],
+                        'direction': direction
+                    })
+
+        return crossings
+
+    def has_activity(self) -> bool:
+        """Check whether anything was counted since the last report"""
+        if self.new_tracks > 0:
+            return True
+        return any(counts['in'] or counts['out'] for counts in self.pending.values())
+
+    def collect_report(self) -> Dict:
+        """Return the counts accumulated since the last report and reset them"""
+        report = {
+            'new_objects': self.new_tracks,
+            'visible_objects': sum(1 for t in self.tracker.tracks.values() if t['missed'] == 0),
+            'lines': {
+                name: {
+                    'in': self.pending[name]['in'],
+                    'out': self.pending[name]['out'],
+                    'total_in': self.totals[name]['in'],
+                    'total_out': self.totals[name]['out']
+                }
+                for name in self.totals
+            }
+        }
+
+        self.pending = {name: {'in': 0, 'out': 0} for name in self.totals}
+        self.new_tracks = 0
+        return report
+
+    def _crossing_direction(self, p1: tuple, p2: tuple, a: tuple, b: tuple) -> Optional[str]:
+        """Return 'in'/'out' if segment p1->p2 crosses line a->b, otherwise None"""
+        side_before = self._side(a, b, p1)
+        side_after = self._side(a, b, p2)
+        # A point exactly on the line counts as the positive side, so stepping onto
+        # the line and then off it is still one crossing, counted on whichever step
+        # changes side
+        if (side_before >= 0) == (side_after >= 0):
+            return None
+
+        # The movement must also straddle the line segment itself, not its extension;
+        # touching an end of the segment counts
+        side_a = self._side(p1, p2, a)
+        side_b = self._side(p1, p2, b)
+        if side_a * side_b > 0:
+            return None
+
+        return 'in' if side_before < 0 else 'out'
+
+    def _side(self, a: tuple, b: tuple, p: tuple) -> float:
+        return (b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0])
@@ -0,0 +1,49 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple, List
+from fastapi import HTTPException, status, Response
+from sqlalchemy import desc, tuple_, literal
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    """Opaque next-page token for the (created_at, id) keyset"""
+    payload = json.dumps([created_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, uuid.UUID]]:
+    """Decode a cursor query parameter, rejecting tampered tokens with 400"""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def keyset_order(query, model):
+    """Newest first with id as tie-breaker, matching the cursor key"""
+    return query.order_by(desc(model.created_at), desc(model.id))
+
+def apply_keyset(query, model, cursor: Tuple[datetime, uuid.UUID]):
+    """Continue strictly after the row the cursor points at"""
+    created_at, row_id = cursor
+    return query.filter(
+        tuple_(model.created_at, model.id)
+        < tuple_(literal(created_at, model.created_at.type), literal(row_id, model.id.type))
+    )
+
+def set_next_cursor(response: Response, rows: List, limit: int):
+    """Expose the next-page token as a header when the page is full"""
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
@@ -0,0 +1,111 @@
+from datetime import date, datetime
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "events"
+# Catches rows outside every monthly partition (late, backfilled or clock-skewed events)
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+# Columns written on insert; generated columns are recomputed by Postgres
+STORED_COLUMNS = "id, event_type, description, camera_id, confidence, metadata, tenant_id, created_at"
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+def create_event_partition(engine: Engine, month: date) -> str:
+    """Create the monthly partition holding `month` if it does not exist yet"""
+    start = month_start(month)
+    end = add_months(start, 1)
+    name = partition_name(start)
+    bounds = {"start": start.isoformat(), "end": end.isoformat()}
+    create = text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+        if exists:
+            return name
+        stranded = conn.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= :start AND created_at < :end)"
+        ), bounds).scalar() if _has_default_partition(conn) else False
+
+        if not stranded:
+            conn.execute(create)
+            return name
+
+        # The default partition holds rows of this month, which would make the new
+        # partition's bounds invalid: take it out, create the month and move them in
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+        conn.execute(create)
+        moved = conn.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= :start AND created_at < :end RETURNING {STORED_COLUMNS}) "
+            f"INSERT INTO {name} ({STORED_COLUMNS}) SELECT {STORED_COLUMNS} FROM moved"
+        ), bounds).rowcount
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    logger.info(f"Moved {moved} events from {DEFAULT_PARTITION} into new partition {name}")
+    return name
+
+def create_default_partition(engine: Engine) -> str:
+    """Create the DEFAULT partition, so an out-of-range created_at never fails an insert"""
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+    return DEFAULT_PARTITION
+
+def _has_default_partition(conn) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION}).scalar()
+
+def ensure_event_partitions(engine: Engine, months_back: int = 1, months_ahead: int = 3) -> List[str]:
+    """Make sure partitions exist around the current month so inserts never fail.
+
+    Rows outside these months land in the DEFAULT partition; once their
+    month gets its own partition they are moved into it.
+    """
+    current = month_start(datetime.utcnow().date())
+    created = []
+    for offset in range(-months_back, months_ahead + 1):
+        created.append(create_event_partition(engine, add_months(current, offset)))
+    create_default_partition(engine)
+    logger.info(f"Event partitions ensured: {created[0]} .. {created[-1]}")
+    return created
+
+def list_event_partitions(engine: Engine) -> List[str]:
+    """Names of the partitions currently attached to the events table"""
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = :parent ORDER BY child.relname"
+        ), {"parent": PARENT_TABLE})
+        return [row[0] for row in rows]
+
+def detach_event_partition(engine: Engine, month: date, drop: bool = False) -> str:
+    """Detach a monthly partition without blocking writers, optionally dropping it.
+
+    DETACH ... CONCURRENTLY cannot run inside a transaction block, so this
+    uses an autocommit connection. The detached table keeps its data and can
+    be archived or dropped independently of the live events table.
+    """
+    name = partition_name(month_start(month))
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+        if drop:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+    logger.info(f"Detached event partition {name}{' and dropped it' if drop else ''}")
+    return name
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Hashes below BCRYPT_ROUNDS count as outdated and are upgraded on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS
+)
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already waiting"""
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so worker threads run in parallel
+    without stalling the loop. At most `max_workers` hashes run at once and at
+    most `max_pending` calls may wait; beyond that callers get
+    PasswordHasherBusy instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self.pending = 0
+        self.rejected = 0
+        self.latencies = {"hash": deque(maxlen=1000), "verify": deque(maxlen=1000)}
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Check a password; also returns a new hash when the stored one is outdated"""
+        return await self._run("verify", pwd_context.verify_and_update, password, hashed_password)
+
+    async def _run(self, operation: str, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy(f"{self.pending} password operations already pending")
+
+        # Latency includes time queued for a worker, which is what callers feel
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.latencies[operation].append(time.perf_counter() - started)
+
+    def get_metrics(self) -> Dict:
+        metrics = {
+            "rounds": BCRYPT_ROUNDS,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected
+        }
+        for operation, samples in self.latencies.items():
+            ordered = sorted(samples)
+            metrics[operation] = {
+                "count": len(ordered),
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1) if ordered else None,
+                "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 1) if ordered else None
+            }
+        return metrics
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    max_workers=int(os.getenv("PASSWORD_HASHER_WORKERS", "4")),
+    max_pending=int(os.getenv("PASSWORD_HASHER_MAX_PENDING", "64"))
+)
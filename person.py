@@ -1,15 +1,21 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy import func
+from typing import Optional, List, Dict, Tuple
 import uuid
 
 from ..models import Person
+from ..pagination import keyset_order, apply_keyset
+from ..cache import dashboard_cache
 from ..schemas import PersonCreate, PersonUpdate
 
 def get_person(db: Session, person_id: str) -> Optional[Person]:
     return db.query(Person).filter(Person.id == person_id).first()
 
-def get_persons(db: Session, tenant_id: str, skip: int = 0, limit: int = 100) -> List[Person]:
-    return db.query(Person).filter(Person.tenant_id == tenant_id).offset(skip).limit(limit).all()
+def get_persons(db: Session, tenant_id: str, skip: int = 0, limit: int = 100, cursor: tuple = None) -> List[Person]:
+    query = keyset_order(db.query(Person).filter(Person.tenant_id == tenant_id), Person)
+    if cursor:
+        return apply_keyset(query, Person, cursor).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
 
 def get_authorized_persons(db: Session, tenant_id: str) -> List[Person]:
     return db.query(Person).filter(
@@ -17,12 +23,31 @@ def get_authorized_persons(db: Session, tenant_id: str) -> List[Person]:
         Person.authorized == True
     ).all()
 
+def get_known_faces(db: Session) -> List[Dict]:
+    """Persons of every tenant with a face encoding, for video processing"""
+    rows = db.query(Person.id, Person.name, Person.tenant_id, Person.face_encodings).filter(
+        Person.face_encodings.isnot(None)
+    ).all()
+    return [
+        {"id": str(row.id), "name": row.name, "tenant_id": str(row.tenant_id), "face_encodings": row.face_encodings}
+        for row in rows
+    ]
+
+def get_known_faces_version(db: Session) -> Tuple:
+    """Cheap fingerprint of get_known_faces; it changes whenever a known face is added, edited or removed"""
+    return tuple(db.query(
+        func.count(Person.id), func.max(func.coalesce(Person.updated_at, Person.created_at))
+    ).filter(Person.face_encodings.isnot(None)).one())
+
 def get_person_by_employee_id(db: Session, employee_id: str, tenant_id: str) -> Optional[Person]:
     return db.query(Person).filter(
         Person.employee_id == employee_id,
         Person.tenant_id == tenant_id
     ).first()
 
+def count_persons(db: Session, tenant_id: str) -> int:
+    return db.query(func.count(Person.id)).filter(Person.tenant_id == tenant_id).scalar()
+
 def create_person(db: Session, person: PersonCreate, tenant_id: str) -> Person:
     db_person = Person(
         id=str(uuid.uuid4()),
@@ -35,6 +60,7 @@ def create_person(db: Session, person: PersonCreate, tenant_id: str) -> Person:
     )
     db.add(db_person)
     db.commit()
+    dashboard_cache.invalidate(db_person.tenant_id)
     db.refresh(db_person)
     return db_person
 
@@ -48,6 +74,7 @@ def update_person(db: Session, person_id: str, person_update: PersonUpdate) -> O
         setattr(db_person, field, value)
     
     db.commit()
+    dashboard_cache.invalidate(db_person.tenant_id)
     db.refresh(db_person)
     return db_person
 
@@ -56,8 +83,10 @@ def delete_person(db: Session, person_id: str) -> bool:
     if not db_person:
         return False
     
+    tenant_id = db_person.tenant_id
     db.delete(db_person)
     db.commit()
+    dashboard_cache.invalidate(tenant_id)
     return True
 
 def update_face_encodings(db: Session, person_id: str, face_encodings: List[float]) -> Optional[Person]:
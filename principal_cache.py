@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the authenticated user, safe to share across requests"""
+    id: str
+    email: str
+    full_name: str
+    role: str
+    tenant_id: str
+    is_active: bool = True
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=str(user.id),
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            tenant_id=user.tenant_id,
+            is_active=bool(user.is_active)
+        )
+
+class PrincipalCache:
+    """Per-process TTL/LRU cache of principals keyed by user id.
+
+    crud.user drops entries on update/delete, so role or activation changes
+    apply immediately on this worker; other workers pick them up within `ttl`.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[Principal]:
+        key = str(user_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id: str, principal: Principal):
+        key = str(user_id)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, principal)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self.lock:
+            self.entries.pop(str(user_id), None)
+
+    def get_stats(self) -> Dict:
+        return {
+            "ttl": self.ttl,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# Global principal cache instance
+principal_cache = PrincipalCache(
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "30")),
+    max_size=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+)
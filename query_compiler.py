@@ -0,0 +1,243 @@
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+# Local time zone used to interpret "today", "after 6pm", etc.
+QUERY_TIMEZONE = ZoneInfo(os.getenv("QUERY_TIMEZONE", "UTC"))
+
+STOPWORDS = {
+    "a", "an", "the", "all", "any", "show", "me", "find", "list", "get", "give",
+    "events", "event", "of", "with", "were", "was", "is", "are", "that", "who",
+    "detected", "detections", "detection", "seen", "spotted", "and", "or", "for",
+    "there", "which", "what", "did", "come", "came", "enter", "entered", "by"
+}
+
+# Words dropped from location phrases; kept narrow so names like "Warehouse A" survive
+LOCATION_FILLER = {"the", "camera", "cameras", "cam"}
+
+# Vocabulary: phrase pattern -> (event_type, metadata filters)
+SUBJECT_PATTERNS = [(re.compile(pattern), event_type, filters) for pattern, event_type, filters in [
+    (r"\b(?:unknown|unrecognized|unrecognised|unidentified)\s+(?:faces?|persons?|people|visitors?)\b",
+     "face_detection", (("name", "Unknown"),)),
+    (r"\btrucks?\b|\blorr(?:y|ies)\b", "vehicle_detection", (("vehicle_type", "truck"),)),
+    (r"\bcars?\b", "vehicle_detection", (("vehicle_type", "car"),)),
+    (r"\bbus(?:es)?\b", "vehicle_detection", (("vehicle_type", "bus"),)),
+    (r"\bmotorcycles?\b|\bbikes?\b", "vehicle_detection", (("vehicle_type", "motorcycle"),)),
+    (r"\bvehicles?\b", "vehicle_detection", ()),
+    (r"\bfaces?\b|\bpersons?\b|\bpeople\b|\bemployees?\b", "face_detection", ()),
+    (r"\bintru(?:sions?|ders?)\b|\btrespass(?:ing|ers?)?\b|\bbreach(?:es)?\b", "intrusion", ()),
+    (r"\b(?:gunny\s+)?bags?\b|\bsacks?\b", "object_detection", (("object_type", "gunny_bag"),)),
+]]
+
+PLATE_PATTERN = re.compile(
+    r"\b(?:plate\s+)?([a-z]{2,3}-\d{3,4}|[a-z]{2}\d{1,2}[a-z]{1,3}\d{3,4})\b"
+)
+
+CLOCK = r"(?:noon|midnight|\d{1,2}(?::\d{2})?\s*(?:am|pm)?)"
+EXPLICIT_CLOCK = r"(?:noon|midnight|\d{1,2}:\d{2}\s*(?:am|pm)?|\d{1,2}\s*(?:am|pm))"
+TIME_OF_DAY_PATTERNS = [
+    (re.compile(rf"\bbetween\s+({CLOCK})\s+and\s+({CLOCK})"), "between"),
+    (re.compile(rf"\b(?:after|since)\s+({CLOCK})"), "after"),
+    (re.compile(rf"\bbefore\s+({CLOCK})"), "before"),
+    (re.compile(rf"\b(?:at|around)\s+({EXPLICIT_CLOCK})"), "at"),
+]
+
+PERIOD_PATTERNS = [
+    (re.compile(r"\b(?:in\s+the\s+)?(?:last|past)\s+(\d+)\s+(minute|hour|day|week)s?\b"), "last"),
+    (re.compile(r"\blast\s+night\b"), "last_night"),
+    (re.compile(r"\byesterday\b"), "yesterday"),
+    (re.compile(r"\btoday\b|\btonight\b"), "today"),
+    (re.compile(r"\bthis\s+week\b"), "this_week"),
+    (re.compile(r"\blast\s+week\b"), "last_week"),
+    (re.compile(r"\bthis\s+month\b"), "this_month"),
+    (re.compile(r"\blast\s+month\b"), "last_month"),
+    (re.compile(r"\b(?:in\s+the\s+)?(?:last|past)\s+(minute|hour|day|week)\b"), "last_one"),
+]
+
+LOCATION_PATTERN = re.compile(r"\b(?:at|in|on|near|from|inside)\s+(?:the\s+)?([a-z0-9][a-z0-9 \-]*)")
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    """Structured, time-relative form of a natural-language event query"""
+    event_types: Tuple[str, ...] = ()
+    metadata: Tuple[Tuple[str, str], ...] = ()
+    camera_terms: Tuple[str, ...] = ()
+    period: Optional[Tuple[str, int]] = None
+    time_of_day: Optional[Tuple[Optional[time], Optional[time]]] = None
+    text: str = ""
+
+    def is_structured(self) -> bool:
+        return bool(
+            self.event_types or self.metadata or self.camera_terms
+            or self.period or self.time_of_day
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "event_types": list(self.event_types),
+            "metadata": dict(self.metadata),
+            "camera_terms": list(self.camera_terms),
+            "period": self.period[0] if self.period else None,
+            "period_amount": self.period[1] if self.period else None,
+            "after": self.time_of_day[0].isoformat() if self.time_of_day and self.time_of_day[0] else None,
+            "before": self.time_of_day[1].isoformat() if self.time_of_day and self.time_of_day[1] else None,
+            "text": self.text
+        }
+
+def compile_query(query: str) -> CompiledQuery:
+    """Compile a natural-language query; results are cached per normalized text"""
+    return _compile_normalized(" ".join(query.lower().split()))
+
+@lru_cache(maxsize=1024)
+def _compile_normalized(text: str) -> CompiledQuery:
+    event_types = []
+    metadata = []
+
+    def take(pattern, string):
+        # Remove a matched phrase so later stages do not reinterpret it
+        match = pattern.search(string)
+        if not match:
+            return None, string
+        return match, string[:match.start()] + " " + string[match.end():]
+
+    plate_match, text = take(PLATE_PATTERN, text)
+    if plate_match:
+        event_types.append("vehicle_detection")
+        metadata.append(("license_plate", plate_match.group(1).upper()))
+
+    time_of_day = None
+    for pattern, kind in TIME_OF_DAY_PATTERNS:
+        match, text = take(pattern, text)
+        if match:
+            if kind == "between":
+                time_of_day = (_parse_clock(match.group(1)), _parse_clock(match.group(2)))
+            elif kind == "after":
+                time_of_day = (_parse_clock(match.group(1)), None)
+            elif kind == "at":
+                # One hour from the given time; past 23:00 it wraps into the next day
+                clock = _parse_clock(match.group(1))
+                time_of_day = (clock, (datetime.combine(datetime.min.date(), clock) + timedelta(hours=1)).time())
+            else:
+                time_of_day = (None, _parse_clock(match.group(1)))
+            break
+
+    period = None
+    for pattern, kind in PERIOD_PATTERNS:
+        match, text = take(pattern, text)
+        if match:
+            if kind == "last":
+                period = (f"last_{match.group(2)}s", int(match.group(1)))
+            elif kind == "last_one":
+                period = (f"last_{match.group(1)}s", 1)
+            else:
+                period = (kind, 0)
+            break
+
+    for pattern, event_type, filters in SUBJECT_PATTERNS:
+        if pattern.search(text):
+            text = pattern.sub(" ", text)
+            if event_type not in event_types:
+                event_types.append(event_type)
+            metadata.extend(f for f in filters if f not in metadata)
+
+    camera_terms = []
+    location_match, text = take(LOCATION_PATTERN, text)
+    if location_match:
+        words = [w for w in location_match.group(1).split() if w not in LOCATION_FILLER]
+        if words:
+            camera_terms.append(" ".join(words))
+
+    residual = [w for w in re.findall(r"[a-z0-9\-]+", text) if w not in STOPWORDS]
+
+    return CompiledQuery(
+        event_types=tuple(event_types),
+        metadata=tuple(metadata),
+        camera_terms=tuple(camera_terms),
+        period=period,
+        time_of_day=time_of_day,
+        text=" ".join(residual)
+    )
+
+def _parse_clock(value: str) -> time:
+    value = value.strip()
+    if value == "noon":
+        return time(12, 0)
+    if value == "midnight":
+        return time(0, 0)
+
+    match = re.match(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", value)
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    return time(min(hour, 23), min(minute, 59))
+
+def resolve_time_range(
+    compiled: CompiledQuery, now: Optional[datetime] = None
+) -> Tuple[Optional[datetime], Optional[datetime], Optional[Tuple[Optional[time], Optional[time]]]]:
+    """Turn the relative period into absolute bounds.
+
+    Returns (start, end, time_of_day). When the range is a single day the
+    time-of-day window is folded into start/end so the query stays a pure
+    created_at range; otherwise it is returned for a per-day filter.
+    A window whose start is after its end ("between 10pm and 2am") crosses
+    midnight and runs into the following day.
+    """
+    now = (now or datetime.now(QUERY_TIMEZONE)).astimezone(QUERY_TIMEZONE)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end = None
+    single_day = None
+
+    if compiled.period:
+        kind, amount = compiled.period
+        if kind.startswith("last_") and kind.endswith("s") and kind != "last_night":
+            unit = kind[len("last_"):]
+            start, end = now - timedelta(**{unit: amount}), now
+        elif kind == "today":
+            start, end, single_day = midnight, now, midnight
+        elif kind == "yesterday":
+            single_day = midnight - timedelta(days=1)
+            start, end = single_day, midnight
+        elif kind == "last_night":
+            start, end = midnight - timedelta(hours=6), midnight + timedelta(hours=6)
+        elif kind == "this_week":
+            start, end = midnight - timedelta(days=now.weekday()), now
+        elif kind == "last_week":
+            end = midnight - timedelta(days=now.weekday())
+            start = end - timedelta(days=7)
+        elif kind == "this_month":
+            start, end = midnight.replace(day=1), now
+        elif kind == "last_month":
+            end = midnight.replace(day=1)
+            start = (end - timedelta(days=1)).replace(day=1)
+    elif compiled.time_of_day:
+        # A bare "after 6pm" means today; an overnight window still running means since last night
+        single_day = midnight
+        if _crosses_midnight(compiled.time_of_day) and now.time() < compiled.time_of_day[1]:
+            single_day = midnight - timedelta(days=1)
+        start, end = single_day, now
+
+    time_of_day = compiled.time_of_day
+    if time_of_day and single_day is not None:
+        after, before = time_of_day
+        if _crosses_midnight(time_of_day):
+            # The window ends on the next day, possibly past the period's own end
+            start = max(start, datetime.combine(single_day.date(), after, QUERY_TIMEZONE))
+            end = datetime.combine(single_day.date() + timedelta(days=1), before, QUERY_TIMEZONE)
+            return start, end, None
+        if after:
+            start = max(start, datetime.combine(single_day.date(), after, QUERY_TIMEZONE))
+        if before:
+            end = min(end, datetime.combine(single_day.date(), before, QUERY_TIMEZONE))
+        time_of_day = None
+
+    return start, end, time_of_day
+
+def _crosses_midnight(time_of_day: Tuple[Optional[time], Optional[time]]) -> bool:
+    after, before = time_of_day
+    return after is not None and before is not None and after > before
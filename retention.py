@@ -0,0 +1,281 @@
+import heapq
+import json
+import os
+import uuid
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, engine
+from .models import Event
+from .partitions import month_start
+from .cache import dashboard_cache
+from .crud.retention_policy import get_retention_policies
+
+logger = logging.getLogger(__name__)
+
+# Cold tier layout: <ARCHIVE_DIR>/tenant_id=<uuid>/month=<YYYY-MM>/events-<day>-*.parquet
+ARCHIVE_DIR = os.getenv("EVENT_ARCHIVE_DIR", "./archive/events")
+RETENTION_DELETE_BATCH = int(os.getenv("RETENTION_DELETE_BATCH", "5000"))
+# Rows per record batch when scanning archive files for a page
+ARCHIVE_SCAN_BATCH = 10000
+
+# Postgres advisory lock key held while retention runs, so only one worker archives at a time
+RETENTION_LOCK_KEY = 0x53534333  # "SSC3"
+
+ARCHIVE_COLUMNS = (
+    Event.id, Event.created_at, Event.event_type, Event.camera_id, Event.confidence,
+    Event.description, Event.event_metadata, Event.person_id, Event.license_plate, Event.zone_name
+)
+
+def _archive_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("event_type", pa.string()),
+        ("camera_id", pa.string()),
+        ("confidence", pa.float64()),
+        ("description", pa.string()),
+        ("metadata", pa.string()),
+        ("person_id", pa.string()),
+        ("license_plate", pa.string()),
+        ("zone_name", pa.string()),
+    ])
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def archive_month_dir(tenant_id: str, month: date) -> str:
+    return os.path.join(ARCHIVE_DIR, f"tenant_id={tenant_id}", f"month={month:%Y-%m}")
+
+def _write_archive_file(tenant_id: str, day: date, rows: List[tuple]) -> str:
+    """Write one day's rows to a zstd Parquet file, durably, before they are deleted.
+
+    The name is derived from the first row, so re-archiving the same batch
+    after a crash overwrites the earlier file instead of adding a copy.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = archive_month_dir(tenant_id, month_start(day))
+    os.makedirs(directory, exist_ok=True)
+    first = rows[0]
+    name = f"events-{day:%Y%m%d}-{_as_utc(first.created_at):%H%M%S%f}-{str(first.id)[:8]}.parquet"
+    path = os.path.join(directory, name)
+
+    columns = {
+        "id": [str(row.id) for row in rows],
+        "created_at": [row.created_at for row in rows],
+        "event_type": [row.event_type for row in rows],
+        "camera_id": [str(row.camera_id) for row in rows],
+        "confidence": [row.confidence for row in rows],
+        "description": [row.description for row in rows],
+        "metadata": [json.dumps(row.event_metadata) if row.event_metadata is not None else None for row in rows],
+        "person_id": [row.person_id for row in rows],
+        "license_plate": [row.license_plate for row in rows],
+        "zone_name": [row.zone_name for row in rows],
+    }
+    table = pa.Table.from_pydict(columns, schema=_archive_schema())
+
+    # Write under a temporary name so readers never see a partial file
+    temporary = path + ".tmp"
+    pq.write_table(table, temporary, compression="zstd")
+    with open(temporary, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    return path
+
+def archive_tenant_events(db: Session, tenant_id: str, retain_days: int, now: datetime = None) -> int:
+    """Move a tenant's events older than `retain_days` to Parquet, then delete them.
+
+    Works in batches of RETENTION_DELETE_BATCH rows: each batch is written to
+    the archive and fsynced before its rows are deleted and committed, so a
+    crash can at worst leave a row in both tiers or in two archive files;
+    readers de-duplicate by id.
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retain_days)
+    archived = 0
+
+    while True:
+        rows = db.query(*ARCHIVE_COLUMNS).filter(
+            Event.tenant_id == tenant_id,
+            Event.created_at < cutoff
+        ).order_by(Event.created_at, Event.id).limit(RETENTION_DELETE_BATCH).all()
+        if not rows:
+            break
+
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(_as_utc(row.created_at).date(), []).append(row)
+        for day, day_rows in by_day.items():
+            _write_archive_file(tenant_id, day, day_rows)
+
+        db.query(Event).filter(
+            Event.tenant_id == tenant_id,
+            tuple_(Event.id, Event.created_at).in_([(row.id, row.created_at) for row in rows])
+        ).delete(synchronize_session=False)
+        db.commit()
+        archived += len(rows)
+
+    # Hourly rollups are kept, so dashboard trends still cover archived events
+    if archived:
+        dashboard_cache.invalidate(tenant_id)
+        logger.info(f"Archived {archived} events for tenant {tenant_id} older than {cutoff.isoformat()}")
+    return archived
+
+def run_retention(db: Session, now: datetime = None) -> Dict[str, int]:
+    """Apply every tenant's retention policy; returns archived counts per tenant"""
+    now = now or datetime.now(timezone.utc)
+    results = {}
+    for policy in get_retention_policies(db):
+        tenant_id = str(policy.tenant_id)
+        try:
+            results[tenant_id] = archive_tenant_events(db, tenant_id, policy.retain_days, now)
+            policy.last_run_at = now
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Event retention failed for tenant {tenant_id}: {e}")
+    return results
+
+def enforce_retention() -> Dict[str, int]:
+    """Run retention on a dedicated session; for background tasks and scripts.
+
+    Holds a Postgres advisory lock for the run, so when several workers or
+    a script start retention at once only one of them archives.
+    """
+    with engine.connect() as lock_conn:
+        locked = lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": RETENTION_LOCK_KEY}).scalar()
+        if not locked:
+            logger.info("Event retention already running elsewhere, skipping")
+            return {}
+
+        db = SessionLocal()
+        try:
+            return run_retention(db)
+        finally:
+            db.close()
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RETENTION_LOCK_KEY})
+
+def read_archived_events(
+    tenant_id: str,
+    limit: int,
+    event_type: str = None,
+    camera_id: str = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    cursor: tuple = None,
+    person_id: str = None,
+    license_plate: str = None,
+    zone_name: str = None
+) -> List[Event]:
+    """Newest-first archived events matching the get_events filters.
+
+    Returns detached Event objects so callers can merge them with hot rows.
+    The per-day files are scanned one day at a time, newest first, skipping
+    days outside the requested range. Record batches stream through a heap
+    holding only the newest `limit` rows, and the scan stops after the first
+    day that fills it, since every older day only holds older rows.
+    """
+    tenant_dir = os.path.join(ARCHIVE_DIR, f"tenant_id={tenant_id}")
+    if limit <= 0 or not os.path.isdir(tenant_dir):
+        return []
+
+    import pyarrow.dataset as ds
+
+    start_date = _as_utc(start_date) if start_date else None
+    end_date = _as_utc(end_date) if end_date else None
+    upper = end_date
+    if cursor:
+        upper = min(upper, _as_utc(cursor[0])) if upper else _as_utc(cursor[0])
+
+    expression = ds.field("id").is_valid()
+    for name, value in (
+        ("event_type", event_type), ("camera_id", camera_id), ("person_id", person_id),
+        ("license_plate", license_plate.upper() if license_plate else None), ("zone_name", zone_name)
+    ):
+        if value:
+            expression &= ds.field(name) == str(value)
+    if start_date:
+        expression &= ds.field("created_at") >= start_date
+    if end_date:
+        expression &= ds.field("created_at") <= end_date
+    if cursor:
+        cursor_at, cursor_id = _as_utc(cursor[0]), str(cursor[1])
+        expression &= (ds.field("created_at") < cursor_at) | (
+            (ds.field("created_at") == cursor_at) & (ds.field("id") < cursor_id)
+        )
+
+    # Min-heap of the newest `limit` rows; ids in it are tracked because a row
+    # archived twice (crash between write and delete) must count once
+    newest = []
+    kept_ids = set()
+    for day, files in _archive_days(tenant_dir):
+        day_start = datetime.combine(day, datetime.min.time(), timezone.utc)
+        if start_date and day_start + timedelta(days=1) <= start_date:
+            break
+        if upper and day_start > upper:
+            continue
+
+        dataset = ds.dataset(files, format="parquet", schema=_archive_schema())
+        for batch in dataset.to_batches(filter=expression, batch_size=ARCHIVE_SCAN_BATCH):
+            for record in batch.to_pylist():
+                if record["id"] in kept_ids:
+                    continue
+                key = (record["created_at"], record["id"])
+                if len(newest) < limit:
+                    heapq.heappush(newest, (key, record))
+                    kept_ids.add(record["id"])
+                elif key > newest[0][0]:
+                    _, evicted = heapq.heapreplace(newest, (key, record))
+                    kept_ids.discard(evicted["id"])
+                    kept_ids.add(record["id"])
+        if len(newest) >= limit:
+            break
+
+    ordered = sorted(newest, key=lambda item: item[0], reverse=True)
+    return [_to_event(tenant_id, record) for _, record in ordered]
+
+def _archive_days(tenant_dir: str):
+    """(day, file paths) for a tenant's archive, newest day first"""
+    days = {}
+    for entry in os.listdir(tenant_dir):
+        if not entry.startswith("month="):
+            continue
+        month_dir = os.path.join(tenant_dir, entry)
+        for name in os.listdir(month_dir):
+            # events-YYYYMMDD-...parquet, see _write_archive_file
+            if name.startswith("events-") and name.endswith(".parquet"):
+                day = datetime.strptime(name[len("events-"):len("events-") + 8], "%Y%m%d").date()
+                days.setdefault(day, []).append(os.path.join(month_dir, name))
+    return sorted(days.items(), reverse=True)
+
+def _to_event(tenant_id: str, record: dict) -> Event:
+    return Event(
+        id=uuid.UUID(record["id"]),
+        tenant_id=uuid.UUID(str(tenant_id)),
+        camera_id=uuid.UUID(record["camera_id"]),
+        event_type=record["event_type"],
+        description=record["description"],
+        confidence=record["confidence"],
+        event_metadata=json.loads(record["metadata"]) if record["metadata"] is not None else None,
+        created_at=record["created_at"]
+    )
+
+def get_archive_stats(tenant_id: Optional[str] = None) -> Dict:
+    """File count and size of the cold tier, optionally for one tenant"""
+    root = os.path.join(ARCHIVE_DIR, f"tenant_id={tenant_id}") if tenant_id else ARCHIVE_DIR
+    files = 0
+    size = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(".parquet"):
+                files += 1
+                size += os.path.getsize(os.path.join(directory, name))
+    return {"directory": ARCHIVE_DIR, "files": files, "bytes": size}
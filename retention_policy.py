@@ -0,0 +1,31 @@
+from sqlalchemy.orm import Session
+from typing import Optional, List
+
+from ..models import EventRetentionPolicy
+
+def get_retention_policy(db: Session, tenant_id: str) -> Optional[EventRetentionPolicy]:
+    return db.query(EventRetentionPolicy).filter(EventRetentionPolicy.tenant_id == tenant_id).first()
+
+def get_retention_policies(db: Session) -> List[EventRetentionPolicy]:
+    return db.query(EventRetentionPolicy).all()
+
+def set_retention_policy(db: Session, tenant_id: str, retain_days: int) -> EventRetentionPolicy:
+    db_policy = get_retention_policy(db, tenant_id)
+    if db_policy:
+        db_policy.retain_days = retain_days
+    else:
+        db_policy = EventRetentionPolicy(tenant_id=tenant_id, retain_days=retain_days)
+        db.add(db_policy)
+    
+    db.commit()
+    db.refresh(db_policy)
+    return db_policy
+
+def delete_retention_policy(db: Session, tenant_id: str) -> bool:
+    db_policy = get_retention_policy(db, tenant_id)
+    if not db_policy:
+        return False
+    
+    db.delete(db_policy)
+    db.commit()
+    return True
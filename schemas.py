@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
 
@@ -130,4 +130,16 @@ class EventResponse(BaseModel):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EventBatchResponse(BaseModel):
+    ids: List[str]
+    count: int
+
+class RetentionPolicyUpdate(BaseModel):
+    retain_days: int
+
+class RetentionPolicyResponse(BaseModel):
+    tenant_id: str
+    retain_days: int
+    last_run_at: Optional[datetime] = None
@@ -1,13 +1,12 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from typing import Optional, List
-from passlib.context import CryptContext
 import uuid
 
 from ..models import User, Tenant
 from ..schemas import UserCreate, UserUpdate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from ..principal_cache import principal_cache
+from ..password_hasher import pwd_context
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -27,8 +26,9 @@ def get_user_by_email(db: Session, email: str, tenant_id: str = None) -> Optiona
 def get_users(db: Session, tenant_id: str, skip: int = 0, limit: int = 100) -> List[User]:
     return db.query(User).filter(User.tenant_id == tenant_id).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: UserCreate, tenant_id: str) -> User:
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, tenant_id: str, hashed_password: str = None) -> User:
+    # Async callers hash on the password hasher pool and pass the result in
+    hashed_password = hashed_password or get_password_hash(user.password)
     db_user = User(
         id=str(uuid.uuid4()),
         email=user.email,
@@ -51,22 +51,36 @@ def authenticate_user(db: Session, email: str, password: str, tenant_id: str = N
         return None
     return user
 
-def update_user(db: Session, user_id: str, user_update: UserUpdate) -> Optional[User]:
+def update_user(
+    db: Session, user_id: str, user_update: UserUpdate, hashed_password: str = None
+) -> Optional[User]:
     db_user = get_user(db, user_id)
     if not db_user:
         return None
     
     update_data = user_update.dict(exclude_unset=True)
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        password = update_data.pop("password")
+        update_data["hashed_password"] = hashed_password or get_password_hash(password)
     
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
     db.commit()
+    principal_cache.invalidate(user_id)
     db.refresh(db_user)
     return db_user
 
+def set_password_hash(db: Session, user_id: str, hashed_password: str) -> Optional[User]:
+    """Store an upgraded hash for the same password, e.g. after a cost increase"""
+    db_user = get_user(db, user_id)
+    if not db_user:
+        return None
+    
+    db_user.hashed_password = hashed_password
+    db.commit()
+    return db_user
+
 def delete_user(db: Session, user_id: str) -> bool:
     db_user = get_user(db, user_id)
     if not db_user:
@@ -74,4 +88,5 @@ def delete_user(db: Session, user_id: str) -> bool:
     
     db.delete(db_user)
     db.commit()
+    principal_cache.invalidate(user_id)
     return True
\ No newline at end of file
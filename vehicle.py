@@ -1,15 +1,21 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import Optional, List
 import uuid
 
 from ..models import Vehicle
+from ..pagination import keyset_order, apply_keyset
+from ..cache import dashboard_cache
 from ..schemas import VehicleCreate, VehicleUpdate
 
 def get_vehicle(db: Session, vehicle_id: str) -> Optional[Vehicle]:
     return db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
 
-def get_vehicles(db: Session, tenant_id: str, skip: int = 0, limit: int = 100) -> List[Vehicle]:
-    return db.query(Vehicle).filter(Vehicle.tenant_id == tenant_id).offset(skip).limit(limit).all()
+def get_vehicles(db: Session, tenant_id: str, skip: int = 0, limit: int = 100, cursor: tuple = None) -> List[Vehicle]:
+    query = keyset_order(db.query(Vehicle).filter(Vehicle.tenant_id == tenant_id), Vehicle)
+    if cursor:
+        return apply_keyset(query, Vehicle, cursor).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
 
 def get_authorized_vehicles(db: Session, tenant_id: str) -> List[Vehicle]:
     return db.query(Vehicle).filter(
@@ -23,6 +29,9 @@ def get_vehicle_by_license_plate(db: Session, license_plate: str, tenant_id: str
         Vehicle.tenant_id == tenant_id
     ).first()
 
+def count_vehicles(db: Session, tenant_id: str) -> int:
+    return db.query(func.count(Vehicle.id)).filter(Vehicle.tenant_id == tenant_id).scalar()
+
 def create_vehicle(db: Session, vehicle: VehicleCreate, tenant_id: str) -> Vehicle:
     db_vehicle = Vehicle(
         id=str(uuid.uuid4()),
@@ -35,6 +44,7 @@ def create_vehicle(db: Session, vehicle: VehicleCreate, tenant_id: str) -> Vehic
     )
     db.add(db_vehicle)
     db.commit()
+    dashboard_cache.invalidate(db_vehicle.tenant_id)
     db.refresh(db_vehicle)
     return db_vehicle
 
@@ -51,6 +61,7 @@ def update_vehicle(db: Session, vehicle_id: str, vehicle_update: VehicleUpdate)
         setattr(db_vehicle, field, value)
     
     db.commit()
+    dashboard_cache.invalidate(db_vehicle.tenant_id)
     db.refresh(db_vehicle)
     return db_vehicle
 
@@ -59,6 +70,8 @@ def delete_vehicle(db: Session, vehicle_id: str) -> bool:
     if not db_vehicle:
         return False
     
+    tenant_id = db_vehicle.tenant_id
     db.delete(db_vehicle)
     db.commit()
+    dashboard_cache.invalidate(tenant_id)
     return True
\ No newline at end of file
@@ -4,9 +4,14 @@ from ultralytics import YOLO
 from paddleocr import PaddleOCR
 from typing import List, Dict, Optional
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Plates are 3-12 letters, digits or hyphens once spaces and punctuation are removed
+MIN_PLATE_LENGTH = 3
+MAX_PLATE_LENGTH = 12
+
 class VehicleDetectionService:
     def __init__(self):
         # Load YOLO model for vehicle detection
@@ -18,9 +23,17 @@ class VehicleDetectionService:
         # Vehicle classes from COCO dataset
         self.vehicle_classes = ['car', 'motorcycle', 'bus', 'truck']
     
-    def detect_vehicles(self, frame: np.ndarray, confidence_threshold: float = 0.5) -> List[Dict]:
-        """Detect vehicles in video frame"""
+    def detect_vehicles(self, frame: np.ndarray, confidence_threshold: float = 0.5,
+                        detections: Optional[List[Dict]] = None) -> List[Dict]:
+        """Detect vehicles in video frame, reusing detections from a shared pass if given"""
         try:
+            if detections is not None:
+                return [
+                    detection for detection in detections
+                    if detection['class'] in self.vehicle_classes
+                    and detection['confidence'] >= confidence_threshold
+                ]
+            
             results = self.yolo_model(frame)
             detections = []
             
@@ -71,12 +84,12 @@ class VehicleDetectionService:
                             if len(word_info) >= 2:
                                 texts.append(word_info[1][0])
                 
-                # Join all text and clean up
-                license_plate = ''.join(texts).strip()
+                # Join all text and keep only letters, digits and hyphens
+                license_plate = re.sub(r'[^A-Z0-9-]', '', ''.join(texts).upper())
                 
-                # Basic validation for license plate format
-                if len(license_plate) >= 3:
-                    return license_plate.upper()
+                # Longer reads are other text in the vehicle box, not a plate
+                if MIN_PLATE_LENGTH <= len(license_plate) <= MAX_PLATE_LENGTH:
+                    return license_plate
             
             return None
             
@@ -2,6 +2,7 @@ import asyncio
 import logging
 from typing import Dict, List, Optional, Callable
 from .ai_services.video_processor import VideoProcessor
+from .event_bus import event_bus
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +10,8 @@ class VideoManager:
     def __init__(self, event_callback: Optional[Callable] = None):
         self.processors: Dict[str, VideoProcessor] = {}
         self.event_callback = event_callback
+        # Known persons per tenant; each processor only matches its own tenant's faces
+        self.known_faces: Dict[str, List[Dict]] = {}
         
     def add_camera(self, camera_config: Dict):
         """Add a new camera for processing"""
@@ -19,6 +22,7 @@ class VideoManager:
             return
         
         processor = VideoProcessor(camera_config, self.event_callback)
+        processor.load_known_faces(self.known_faces.get(str(camera_config.get('tenant_id')), []))
         self.processors[camera_id] = processor
         
         if camera_config.get('is_active', False):
@@ -53,6 +57,7 @@ class VideoManager:
             
             # Create new processor with updated config
             processor = VideoProcessor(camera_config, self.event_callback)
+            processor.load_known_faces(self.known_faces.get(str(camera_config.get('tenant_id')), []))
             self.processors[camera_id] = processor
             
             if camera_config.get('is_active', False):
@@ -60,10 +65,28 @@ class VideoManager:
             
             logger.info(f"Updated camera: {camera_config['name']}")
     
+    def sync_cameras(self, camera_configs: List[Dict]):
+        """Process exactly these cameras, restarting only those whose config changed"""
+        configs = {config['id']: config for config in camera_configs}
+        for camera_id in list(self.processors):
+            if camera_id not in configs:
+                self.remove_camera(camera_id)
+        for camera_id, config in configs.items():
+            processor = self.processors.get(camera_id)
+            if processor is None:
+                self.add_camera(config)
+            elif processor.camera_config != config:
+                self.update_camera(camera_id, config)
+    
     def load_known_faces(self, persons_data: List[Dict]):
-        """Load known faces for all cameras"""
+        """Load known faces for all cameras, grouped by the persons' tenant"""
+        known_faces: Dict[str, List[Dict]] = {}
+        for person in persons_data:
+            known_faces.setdefault(str(person['tenant_id']), []).append(person)
+        self.known_faces = known_faces
+        
         for processor in self.processors.values():
-            processor.load_known_faces(persons_data)
+            processor.load_known_faces(known_faces.get(str(processor.camera_config.get('tenant_id')), []))
     
     def get_camera_frame(self, camera_id: str):
         """Get latest frame from a specific camera"""
@@ -71,6 +94,20 @@ class VideoManager:
             return self.processors[camera_id].get_frame()
         return None
     
+    def get_processor(self, camera_id: str) -> Optional[VideoProcessor]:
+        """Running processor of a camera, for live view"""
+        processor = self.processors.get(camera_id)
+        if processor and processor.is_running:
+            return processor
+        return None
+    
+    def get_tenant_cameras(self, tenant_id: str) -> List[str]:
+        """Camera IDs of one tenant processed by this manager"""
+        return [
+            camera_id for camera_id, processor in self.processors.items()
+            if str(processor.camera_config.get('tenant_id')) == str(tenant_id)
+        ]
+    
     def get_active_cameras(self) -> List[str]:
         """Get list of active camera IDs"""
         return [
@@ -83,4 +120,7 @@ class VideoManager:
         for processor in self.processors.values():
             processor.stop()
         self.processors.clear()
-        logger.info("Stopped all camera processing")
\ No newline at end of file
+        logger.info("Stopped all camera processing")
+
+# Global video manager instance; detections go through the batched event bus
+video_manager = VideoManager(event_callback=event_bus.publish)
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+
+from sqlalchemy import text
+
+from .database import engine, AsyncSessionLocal
+from .models import Camera
+from .video_manager import video_manager
+from .crud import camera as crud_camera, person as crud_person
+
+logger = logging.getLogger(__name__)
+
+# Video processing ownership.
+#
+# Each camera stream may only be opened by one process: every open stream
+# runs inference and publishes its detections, so N API workers would store
+# and broadcast every event N times. Workers with VIDEO_PROCESSING_ENABLED
+# therefore elect one owner through a Postgres advisory lock. Since camera
+# and person changes can be made through any worker, the owner picks them up
+# by reconciling with the database rather than through the request that
+# made them.
+
+VIDEO_SYNC_INTERVAL = float(os.getenv("VIDEO_SYNC_INTERVAL", "10"))  # seconds
+# Postgres advisory lock key held by the one worker that runs video processing
+VIDEO_PROCESSING_LOCK_KEY = 0x53534356  # "SSCV"
+
+def _camera_config(camera: Camera) -> dict:
+    return {
+        "id": str(camera.id),
+        "name": camera.name,
+        "rtsp_url": camera.rtsp_url,
+        "location": camera.location,
+        "is_active": camera.is_active,
+        "ai_detection_enabled": camera.ai_detection_enabled,
+        "tenant_id": str(camera.tenant_id)
+    }
+
+# Set after camera or person changes so the owner syncs now instead of at the next interval
+video_sync_requested = asyncio.Event()
+
+def request_video_sync():
+    video_sync_requested.set()
+
+def _acquire_video_processing_lock():
+    """Connection holding the video processing lock, or None if another worker has it"""
+    conn = engine.connect()
+    try:
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": VIDEO_PROCESSING_LOCK_KEY}
+        ).scalar()
+        # Session-level lock: it outlives the transaction, which must not stay open
+        conn.commit()
+    except Exception:
+        conn.close()
+        raise
+    if not locked:
+        conn.close()
+        return None
+    return conn
+
+def _check_video_processing_lock(conn) -> bool:
+    """Whether the lock is still held; it lives exactly as long as its connection"""
+    try:
+        conn.execute(text("SELECT 1"))
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Lost the video processing lock: {e}")
+        try:
+            conn.close()
+        except Exception:
+            pass
+        return False
+
+def _release_video_processing_lock(conn):
+    try:
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": VIDEO_PROCESSING_LOCK_KEY})
+        conn.commit()
+    finally:
+        conn.close()
+
+async def _sync_video_processing(faces_version):
+    """Reconcile processors and known faces with the database; returns the faces version loaded"""
+    async with AsyncSessionLocal() as db:
+        cameras = await db.run_sync(crud_camera.get_all_active_cameras)
+        version = await db.run_sync(crud_person.get_known_faces_version)
+        persons = await db.run_sync(crud_person.get_known_faces) if version != faces_version else None
+    
+    # Starting/stopping processors opens streams and joins threads, so keep it off the loop
+    if persons is not None:
+        await asyncio.to_thread(video_manager.load_known_faces, persons)
+    await asyncio.to_thread(video_manager.sync_cameras, [_camera_config(camera) for camera in cameras])
+    return version
+
+async def run_video_processing():
+    """Capture and analyse cameras on exactly one worker of the deployment.
+
+    Every worker with VIDEO_PROCESSING_ENABLED competes for a Postgres
+    advisory lock; only the holder opens camera streams, so each detection is
+    published once. The holder reconciles its cameras and known faces with
+    the database every VIDEO_SYNC_INTERVAL seconds, so camera and person
+    changes made through any worker reach it. If the holder exits or loses
+    its database connection, the lock is released and another worker takes
+    over. Other workers serve live view through the relay in live_view.py.
+    """
+    lock_conn = None
+    faces_version = None
+    try:
+        while True:
+            try:
+                if lock_conn is None:
+                    lock_conn = await asyncio.to_thread(_acquire_video_processing_lock)
+                    if lock_conn is not None:
+                        logger.info("This worker now runs video processing")
+                        faces_version = None
+                elif not await asyncio.to_thread(_check_video_processing_lock, lock_conn):
+                    # Another worker may hold the lock by now; stop before it duplicates our streams
+                    lock_conn = None
+                    await asyncio.to_thread(video_manager.stop_all)
+                if lock_conn is not None:
+                    faces_version = await _sync_video_processing(faces_version)
+            except Exception as e:
+                logger.error(f"Video processing sync failed: {e}")
+            
+            try:
+                await asyncio.wait_for(video_sync_requested.wait(), VIDEO_SYNC_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            video_sync_requested.clear()
+    finally:
+        if lock_conn is not None:
+            # Processors flush pending events on stop, before the next owner starts
+            await asyncio.to_thread(video_manager.stop_all)
+            await asyncio.to_thread(_release_video_processing_lock, lock_conn)
@@ -1,6 +1,6 @@
 import cv2
 import numpy as np
-from typing import Dict, List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 import threading
 import time
 import logging
@@ -9,6 +9,8 @@ from queue import Queue
 from .face_recognition import FaceRecognitionService
 from .vehicle_detection import VehicleDetectionService
 from .object_detection import ObjectDetectionService
+from .object_tracker import LineCrossingCounter
+from .event_aggregator import EventAggregator
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,13 @@ class VideoProcessor:
         self.is_running = False
         self.frame_queue = Queue(maxsize=10)
         
+        # Latest captured frame and detections for live view; reading them
+        # never takes frames away from the inference queue
+        self.frame_lock = threading.Lock()
+        self.latest_frame = None
+        self.latest_frame_id = 0
+        self.latest_detections = {'faces': [], 'vehicles': [], 'objects': []}
+        
         # Initialize AI services
         self.face_service = FaceRecognitionService()
         self.vehicle_service = VehicleDetectionService()
@@ -34,6 +43,24 @@ class VideoProcessor:
         # Configuration
         self.detection_interval = 1.0  # Process every second
         self.last_detection_time = 0
+        
+        # Gunny bag flow counting across virtual lines
+        self.bag_counter = LineCrossingCounter(
+            camera_config.get('counting_lines', []),
+            max_distance=camera_config.get('tracker_max_distance', 80.0)
+        )
+        self.count_report_interval = camera_config.get('count_report_interval', 60.0)
+        self.last_count_report_time = time.time()
+        
+        # Cascade mode: one YOLO pass per frame, faces searched only inside person boxes
+        self.cascade_inference = camera_config.get('cascade_inference', True)
+        self.face_region_fraction = camera_config.get('face_region_fraction', 0.5)
+        
+        # Repeated detections of the same subject are merged before reaching the callback
+        self.event_aggregator = EventAggregator(
+            window=camera_config.get('event_aggregation_window', 10.0),
+            max_duration=camera_config.get('event_aggregation_max_duration', 60.0)
+        )
     
     def start(self):
         """Start video processing"""
@@ -67,6 +94,10 @@ class VideoProcessor:
         if self.processing_thread:
             self.processing_thread.join(timeout=5)
         
+        # Flush counts and aggregated events gathered since the last report
+        self._report_bag_counts(force=True)
+        self._flush_aggregated_events(force=True)
+        
         logger.info(f"Stopped video processing for camera: {self.camera_config['name']}")
     
     def _capture_frames(self):
@@ -84,6 +115,10 @@ class VideoProcessor:
                     logger.warning("Failed to read frame")
                     continue
                 
+                with self.frame_lock:
+                    self.latest_frame = frame
+                    self.latest_frame_id += 1
+                
                 # Add frame to queue (non-blocking)
                 if not self.frame_queue.full():
                     self.frame_queue.put(frame)
@@ -100,6 +135,8 @@ class VideoProcessor:
         """Process frames for AI detection"""
         while self.is_running:
             try:
+                self._flush_aggregated_events()
+                
                 if self.frame_queue.empty():
                     time.sleep(0.1)
                     continue
@@ -122,8 +159,34 @@ class VideoProcessor:
             if not self.camera_config.get('ai_detection_enabled', False):
                 return
             
+            if self.cascade_inference:
+                # Single shared detection pass gates every downstream stage
+                detections = self.object_service.detect_objects(frame)
+                persons = self.object_service.detect_persons(frame, detections)
+                
+                # Frames without persons skip the face stage entirely
+                face_results = self.face_service.recognize_faces_in_regions(
+                    frame,
+                    [person['bounding_box'] for person in persons],
+                    upper_fraction=self.face_region_fraction
+                ) if persons else []
+                vehicle_detections = self.vehicle_service.detect_vehicles(frame, detections=detections)
+            else:
+                detections = None
+                face_results = self.face_service.recognize_faces(frame)
+                vehicle_detections = self.vehicle_service.detect_vehicles(frame)
+            
+            # Kept for live-view overlays until the next inference pass
+            self.latest_detections = {
+                'faces': face_results,
+                'vehicles': vehicle_detections,
+                'objects': [
+                    detection for detection in detections or []
+                    if detection['class'] not in self.vehicle_service.vehicle_classes
+                ]
+            }
+            
             # Face detection
-            face_results = self.face_service.recognize_faces(frame)
             for face_result in face_results:
                 if face_result['confidence'] > 0.6:
                     self._trigger_event('face_detection', {
@@ -133,7 +196,6 @@ class VideoProcessor:
                     })
             
             # Vehicle detection
-            vehicle_detections = self.vehicle_service.detect_vehicles(frame)
             for detection in vehicle_detections:
                 license_plate = self.vehicle_service.extract_license_plate(
                     frame, detection['bounding_box']
@@ -146,13 +208,10 @@ class VideoProcessor:
                         'confidence': detection['confidence']
                     })
             
-            # Object detection (gunny bags)
-            gunny_bag_count = self.object_service.count_gunny_bags(frame)
-            if gunny_bag_count > 0:
-                self._trigger_event('object_detection', {
-                    'object_type': 'gunny_bag',
-                    'count': gunny_bag_count
-                })
+            # Object detection (gunny bags), counted incrementally per tracked bag
+            gunny_bags = self.object_service.detect_gunny_bags(frame, detections)
+            self.bag_counter.update(gunny_bags)
+            self._report_bag_counts()
             
             # Intrusion detection
             restricted_zones = [
@@ -162,7 +221,7 @@ class VideoProcessor:
                 }
             ]
             
-            intrusions = self.object_service.detect_intrusion(frame, restricted_zones)
+            intrusions = self.object_service.detect_intrusion(frame, restricted_zones, detections)
             for intrusion in intrusions:
                 self._trigger_event('intrusion', {
                     'zone_name': intrusion['zone_name'],
@@ -172,7 +231,40 @@ class VideoProcessor:
         except Exception as e:
             logger.error(f"Error processing frame: {e}")
     
+    def _report_bag_counts(self, force: bool = False):
+        """Emit an aggregated gunny bag count event once per report interval"""
+        current_time = time.time()
+        if not force and current_time - self.last_count_report_time < self.count_report_interval:
+            return
+        
+        period_start = self.last_count_report_time
+        self.last_count_report_time = current_time
+        
+        if not self.bag_counter.has_activity():
+            return
+        
+        report = self.bag_counter.collect_report()
+        self._trigger_event('object_detection', {
+            'object_type': 'gunny_bag',
+            'count': report['new_objects'],
+            'visible': report['visible_objects'],
+            'lines': report['lines'],
+            'period_start': period_start,
+            'period_end': current_time
+        })
+    
     def _trigger_event(self, event_type: str, metadata: Dict):
+        """Trigger an event, merging repeats of the same subject"""
+        metadata = self.event_aggregator.add(event_type, metadata, time.time())
+        if metadata is not None:
+            self._emit_event(event_type, metadata)
+    
+    def _flush_aggregated_events(self, force: bool = False):
+        """Emit summaries for aggregated events whose window has closed"""
+        for event_type, metadata in self.event_aggregator.flush(time.time(), force):
+            self._emit_event(event_type, metadata)
+    
+    def _emit_event(self, event_type: str, metadata: Dict):
         """Trigger an event callback"""
         if self.event_callback:
             try:
@@ -180,6 +272,7 @@ class VideoProcessor:
                     'event_type': event_type,
                     'camera_id': self.camera_config['id'],
                     'camera_name': self.camera_config['name'],
+                    'tenant_id': self.camera_config.get('tenant_id'),
                     'timestamp': time.time(),
                     'metadata': metadata
                 }
@@ -192,7 +285,18 @@ class VideoProcessor:
         self.face_service.load_known_faces(persons_data)
     
     def get_frame(self) -> Optional[np.ndarray]:
-        """Get the latest frame"""
-        if not self.frame_queue.empty():
-            return self.frame_queue.get()
-        return None
\ No newline at end of file
+        """Get the latest frame without consuming the inference queue"""
+        return self.get_latest_frame()[1]
+    
+    def get_latest_frame(self) -> Tuple[int, Optional[np.ndarray]]:
+        """Latest captured frame and its sequence number.
+        
+        The capture thread replaces the frame rather than writing into it, so
+        callers may read it freely but must copy before drawing on it.
+        """
+        with self.frame_lock:
+            return self.latest_frame_id, self.latest_frame
+    
+    def get_latest_detections(self) -> Dict[str, List[Dict]]:
+        """Detections from the most recent inference pass, for overlays"""
+        return self.latest_detections
\ No newline at end of file
@@ -54,6 +54,13 @@ class WebSocketService {
 
   private handleMessage(data: any) {
     const { type } = data;
+
+    // Coalesced frames carry several messages: {"type": "batch", "data": [...]}
+    if (type === 'batch') {
+      data.data.forEach((message: any) => this.handleMessage(message));
+      return;
+    }
+
     const handlers = this.eventHandlers.get(type) || [];
     
     handlers.forEach(handler => {
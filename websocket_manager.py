@@ -1,89 +1,456 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List, Dict
-import json
+from typing import List, Dict, Optional, Set, Tuple, Iterable
+from collections import deque
+import itertools
 import logging
 import asyncio
+import os
+import time
+
+from .broadcast_backend import create_broadcast_backend
+from .ws_encoding import Frame, negotiate_encoding
 
 logger = logging.getLogger(__name__)
 
-class ConnectionManager:
+# Per-connection outbound queue and slow-consumer limits
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+# Evict after more than MAX_DROPPED drops within DROP_WINDOW seconds, so brief bursts
+# spread over a long-lived connection never add up to an eviction
+SLOW_CONSUMER_MAX_DROPPED = int(os.getenv("WS_SLOW_CONSUMER_MAX_DROPPED", "100"))
+SLOW_CONSUMER_DROP_WINDOW = float(os.getenv("WS_SLOW_CONSUMER_DROP_WINDOW", "60"))  # seconds
+SLOW_CONSUMER_MAX_LAG = float(os.getenv("WS_SLOW_CONSUMER_MAX_LAG", "10"))  # seconds
+
+# Upper bound on the index entries one socket's camera x event-type filters may create
+MAX_SUBSCRIPTION_KEYS = int(os.getenv("WS_MAX_SUBSCRIPTION_KEYS", "1000"))
+
+# Optional time-window batching; clients may ask for their own window with ?batch_ms=
+COALESCE_WINDOW_MS = int(os.getenv("WS_COALESCE_WINDOW_MS", "0"))
+MAX_COALESCE_WINDOW_MS = int(os.getenv("WS_MAX_COALESCE_WINDOW_MS", "1000"))
+MAX_COALESCE_MESSAGES = int(os.getenv("WS_MAX_COALESCE_MESSAGES", "500"))
+
+# Close code sent to evicted clients ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Matches any camera or event type in the subscription index
+WILDCARD = "*"
+
+class ClientConnection:
+    """One WebSocket with its own bounded send queue and writer task.
+
+    Broadcasts only enqueue; the writer task drains the queue at whatever
+    pace the client can take, so one slow socket never delays the others.
+    When the queue is full the oldest message is dropped.
+
+    Messages are queued already encoded for the connection's negotiated
+    encoding. With a coalesce window, the writer waits that long after the
+    first message and sends everything queued meanwhile as one batch frame.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        tenant_id: str,
+        user_id: str,
+        encoding,
+        coalesce_window: float = 0.0,
+        queue_size: int = SEND_QUEUE_SIZE
+    ):
+        self.websocket = websocket
+        self.tenant_id = tenant_id
+        self.user_id = user_id
+        self.encoding = encoding
+        self.coalesce_window = coalesce_window
+        # (enqueued_at, message) pairs, oldest first; `ready` wakes the writer
+        self.queue: deque = deque()
+        self.queue_size = queue_size
+        self.ready = asyncio.Event()
+        # Times of recent drops, for the windowed slow-consumer check
+        self.drop_times: deque = deque(maxlen=SLOW_CONSUMER_MAX_DROPPED + 1)
+        self.writer_task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.connected_at = time.time()
+        self.sent = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        # Server-side filters; None means "all", an empty set means "none"
+        self.camera_ids: Optional[Set[str]] = None
+        self.event_types: Optional[Set[str]] = None
+
+    def subscription_keys(self) -> Iterable[Tuple[str, str]]:
+        return itertools.product(
+            {WILDCARD} if self.camera_ids is None else self.camera_ids,
+            {WILDCARD} if self.event_types is None else self.event_types
+        )
+
+    def start(self):
+        self.writer_task = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, message: Frame) -> bool:
+        """Queue a message without waiting; returns False if one had to be dropped"""
+        now = time.monotonic()
+        dropped = len(self.queue) >= self.queue_size
+        if dropped:
+            self.dropped += 1
+            self.drop_times.append(now)
+            self.queue.popleft()
+        self.queue.append((now, message))
+        self.ready.set()
+        return not dropped
+
+    def lag(self) -> float:
+        """Age of the oldest message still waiting to be sent"""
+        if not self.queue:
+            return 0.0
+        return time.monotonic() - self.queue[0][0]
+
+    def recent_drops(self) -> int:
+        """Drops within the last SLOW_CONSUMER_DROP_WINDOW seconds"""
+        cutoff = time.monotonic() - SLOW_CONSUMER_DROP_WINDOW
+        while self.drop_times and self.drop_times[0] < cutoff:
+            self.drop_times.popleft()
+        return len(self.drop_times)
+
+    def is_slow(self) -> bool:
+        return self.recent_drops() > SLOW_CONSUMER_MAX_DROPPED or self.lag() > SLOW_CONSUMER_MAX_LAG
+
+    async def _write_loop(self):
+        try:
+            while True:
+                while not self.queue:
+                    self.ready.clear()
+                    await self.ready.wait()
+                enqueued_at, message = self.queue.popleft()
+                frames = [message]
+                if self.coalesce_window > 0:
+                    # Bounded added latency: at most one window per message
+                    await asyncio.sleep(self.coalesce_window)
+                    while len(frames) < MAX_COALESCE_MESSAGES and self.queue:
+                        frames.append(self.queue.popleft()[1])
+                frame = frames[0] if len(frames) == 1 else self.encoding.batch(frames)
+                if self.encoding.binary:
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                self.sent += len(frames)
+                self.frames_sent += 1
+                self.bytes_sent += len(frame)
+                self.last_lag = time.monotonic() - enqueued_at
+                self.max_lag = max(self.max_lag, self.last_lag)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"WebSocket writer for user {self.user_id} stopped: {e}")
+            await self.close()
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        if self.writer_task and self.writer_task is not asyncio.current_task():
+            self.writer_task.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def get_metrics(self) -> Dict:
+        return {
+            "user_id": self.user_id,
+            "encoding": self.encoding.name,
+            "coalesce_window_ms": round(self.coalesce_window * 1000),
+            "queue_depth": len(self.queue),
+            "sent": self.sent,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": self.dropped,
+            "recent_drops": self.recent_drops(),
+            "lag_ms": round(self.lag() * 1000, 1),
+            "last_send_lag_ms": round(self.last_lag * 1000, 1),
+            "max_send_lag_ms": round(self.max_lag * 1000, 1),
+            "connected_seconds": round(time.time() - self.connected_at)
+        }
+
+class SubscriptionIndex:
+    """Per-tenant index of (camera_id, event_type) -> subscribed connections.
+
+    Connections without filters sit under (WILDCARD, WILDCARD), so a lookup
+    is four set unions no matter how many sockets the tenant has.
+    """
+
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-        self.user_connections: Dict[str, WebSocket] = {}
+        self.entries: Dict[str, Dict[Tuple[str, str], Set[ClientConnection]]] = {}
+
+    def add(self, connection: ClientConnection):
+        tenant_entries = self.entries.setdefault(connection.tenant_id, {})
+        for key in connection.subscription_keys():
+            tenant_entries.setdefault(key, set()).add(connection)
+
+    def remove(self, connection: ClientConnection):
+        tenant_entries = self.entries.get(connection.tenant_id, {})
+        for key in connection.subscription_keys():
+            subscribers = tenant_entries.get(key)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del tenant_entries[key]
+        if not tenant_entries:
+            self.entries.pop(connection.tenant_id, None)
+
+    def match(self, tenant_id: str, camera_id: Optional[str], event_type: Optional[str]) -> Set[ClientConnection]:
+        tenant_entries = self.entries.get(tenant_id)
+        if not tenant_entries:
+            return set()
+        camera_id = str(camera_id) if camera_id else WILDCARD
+        event_type = event_type or WILDCARD
+        matched = set()
+        for key in {(camera_id, event_type), (camera_id, WILDCARD), (WILDCARD, event_type), (WILDCARD, WILDCARD)}:
+            matched |= tenant_entries.get(key, set())
+        return matched
+
+class ConnectionManager:
+    def __init__(self, backend=None):
+        self.active_connections: Dict[str, Dict[WebSocket, ClientConnection]] = {}
+        self.user_connections: Dict[str, ClientConnection] = {}
+        self.subscriptions = SubscriptionIndex()
+        self.evicted = 0
+        # Carries tenant broadcasts between workers; see broadcast_backend.py
+        self.backend = backend or create_broadcast_backend("memory")
+
+    async def start(self):
+        await self.backend.start(self.deliver_to_tenant)
+
+    async def stop(self):
+        await self.backend.stop()
 
     async def connect(self, websocket: WebSocket, tenant_id: str, user_id: str):
-        await websocket.accept()
-        
+        # Encoding is negotiated per socket through Sec-WebSocket-Protocol
+        subprotocol, encoding = negotiate_encoding(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=subprotocol)
+        connection = ClientConnection(websocket, tenant_id, user_id, encoding, _coalesce_window(websocket))
+        connection.start()
+
         # Add to tenant connections
         if tenant_id not in self.active_connections:
-            self.active_connections[tenant_id] = []
-        self.active_connections[tenant_id].append(websocket)
-        
+            self.active_connections[tenant_id] = {}
+        self.active_connections[tenant_id][websocket] = connection
+        self.subscriptions.add(connection)
+
         # Track user connection
-        self.user_connections[user_id] = websocket
-        
-        logger.info(f"WebSocket connected: user {user_id} in tenant {tenant_id}")
+        self.user_connections[user_id] = connection
+
+        logger.info(
+            f"WebSocket connected: user {user_id} in tenant {tenant_id} "
+            f"({encoding.name}, {connection.coalesce_window * 1000:.0f}ms batching)"
+        )
 
     def disconnect(self, websocket: WebSocket, tenant_id: str, user_id: str):
         # Remove from tenant connections
+        connection = None
         if tenant_id in self.active_connections:
-            if websocket in self.active_connections[tenant_id]:
-                self.active_connections[tenant_id].remove(websocket)
-            
+            connection = self.active_connections[tenant_id].pop(websocket, None)
+
             # Clean up empty tenant lists
             if not self.active_connections[tenant_id]:
                 del self.active_connections[tenant_id]
-        
+
+        if connection:
+            self.subscriptions.remove(connection)
+            if connection.writer_task:
+                connection.writer_task.cancel()
+
         # Remove user connection
-        if user_id in self.user_connections:
+        if user_id in self.user_connections and self.user_connections[user_id].websocket is websocket:
             del self.user_connections[user_id]
-        
+
         logger.info(f"WebSocket disconnected: user {user_id} in tenant {tenant_id}")
 
-    async def send_personal_message(self, message: str, user_id: str):
+    async def send(self, websocket: WebSocket, payload: dict, tenant_id: str):
+        """Reply on one socket through its queue, keeping sends on a single writer"""
+        connection = self.active_connections.get(tenant_id, {}).get(websocket)
+        if connection:
+            connection.enqueue(connection.encoding.encode(payload))
+
+    def update_subscription(
+        self,
+        websocket: WebSocket,
+        tenant_id: str,
+        subscribe: bool,
+        camera_ids=None,
+        event_types=None
+    ) -> Optional[Dict]:
+        """Add or remove camera/event-type filters for one socket.
+
+        `camera_ids` and `event_types` come straight from the client and must
+        be lists of strings; anything else, or filters that would need more
+        than MAX_SUBSCRIPTION_KEYS index entries, raises ValueError and leaves
+        the subscription unchanged. Unsubscribing every listed value of a
+        filter leaves it matching nothing (it does not fall back to "all");
+        unsubscribing with neither list clears both filters, returning the
+        socket to receiving all tenant messages.
+        """
+        connection = self.active_connections.get(tenant_id, {}).get(websocket)
+        if not connection:
+            return None
+
+        camera_ids = _filter_values("camera_ids", camera_ids)
+        event_types = _filter_values("event_types", event_types)
+
+        if subscribe:
+            new_camera_ids = _merge_filter(connection.camera_ids, camera_ids)
+            new_event_types = _merge_filter(connection.event_types, event_types)
+        elif camera_ids is None and event_types is None:
+            new_camera_ids = new_event_types = None
+        else:
+            new_camera_ids = _remove_filter(connection.camera_ids, camera_ids)
+            new_event_types = _remove_filter(connection.event_types, event_types)
+
+        keys = len(new_camera_ids or ()) or 1
+        keys *= len(new_event_types or ()) or 1
+        if keys > MAX_SUBSCRIPTION_KEYS:
+            raise ValueError(f"Subscription exceeds {MAX_SUBSCRIPTION_KEYS} camera/event type combinations")
+
+        self.subscriptions.remove(connection)
+        connection.camera_ids = new_camera_ids
+        connection.event_types = new_event_types
+        self.subscriptions.add(connection)
+
+        # null means unfiltered
+        return {
+            "camera_ids": None if connection.camera_ids is None else sorted(connection.camera_ids),
+            "event_types": None if connection.event_types is None else sorted(connection.event_types)
+        }
+
+    async def send_personal_message(self, payload: dict, user_id: str):
         if user_id in self.user_connections:
-            try:
-                await self.user_connections[user_id].send_text(message)
-            except Exception as e:
-                logger.error(f"Error sending personal message to {user_id}: {e}")
+            connection = self.user_connections[user_id]
+            connection.enqueue(connection.encoding.encode(payload))
 
-    async def broadcast_to_tenant(self, message: str, tenant_id: str):
-        if tenant_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[tenant_id]:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to tenant {tenant_id}: {e}")
-                    disconnected.append(connection)
-            
-            # Remove disconnected connections
-            for connection in disconnected:
-                self.active_connections[tenant_id].remove(connection)
+    async def broadcast_to_tenant(self, payload: dict, tenant_id: str):
+        # Every worker (this one included) delivers it via the backend
+        await self.backend.publish(tenant_id, payload)
+
+    async def deliver_to_tenant(self, tenant_id: str, payload: dict):
+        """Serialize and enqueue a message only for the sockets subscribed to it.
+
+        Each distinct message is encoded at most once per encoding, however
+        many sockets receive it.
+        """
+        if payload["type"] == "events":
+            # Batches are split so each socket gets just the events it follows
+            batches: Dict[ClientConnection, List[dict]] = {}
+            for item in payload["data"]:
+                for connection in self.subscriptions.match(tenant_id, item.get("camera_id"), item.get("event_type")):
+                    batches.setdefault(connection, []).append(item)
+            messages = {}
+            for connection, items in batches.items():
+                key = (connection.encoding.name, tuple(id(item) for item in items))
+                if key not in messages:
+                    messages[key] = connection.encoding.encode({"type": "events", "data": items})
+                self._enqueue(connection, messages[key])
+            return
+
+        camera_id, event_type = _routing_keys(payload)
+        subscribers = self.subscriptions.match(tenant_id, camera_id, event_type)
+        if not subscribers:
+            return
+        messages = {}
+        for connection in subscribers:
+            encoding = connection.encoding
+            if encoding.name not in messages:
+                messages[encoding.name] = encoding.encode(payload)
+            self._enqueue(connection, messages[encoding.name])
+
+    def _enqueue(self, connection: ClientConnection, message: Frame):
+        # O(1) enqueue per subscriber; writer tasks do the actual sends
+        connection.enqueue(message)
+        if connection.is_slow():
+            self._evict(connection)
+
+    def _evict(self, connection: ClientConnection):
+        self.evicted += 1
+        logger.warning(
+            f"Evicting slow WebSocket consumer: user {connection.user_id} in tenant {connection.tenant_id} "
+            f"({connection.dropped} dropped, lag {connection.lag():.1f}s)"
+        )
+        self.disconnect(connection.websocket, connection.tenant_id, connection.user_id)
+        asyncio.create_task(connection.close(code=SLOW_CONSUMER_CLOSE_CODE))
 
     async def broadcast_event(self, event_data: dict, tenant_id: str):
-        message = json.dumps({
+        await self.broadcast_to_tenant({
             "type": "event",
             "data": event_data
-        })
-        await self.broadcast_to_tenant(message, tenant_id)
+        }, tenant_id)
+
+    async def broadcast_events(self, events_data: List[dict], tenant_id: str):
+        await self.broadcast_to_tenant({
+            "type": "events",
+            "data": events_data
+        }, tenant_id)
 
     async def broadcast_alert(self, alert_data: dict, tenant_id: str):
-        message = json.dumps({
+        await self.broadcast_to_tenant({
             "type": "alert",
             "data": alert_data
-        })
-        await self.broadcast_to_tenant(message, tenant_id)
+        }, tenant_id)
 
     async def broadcast_camera_status(self, camera_data: dict, tenant_id: str):
-        message = json.dumps({
+        await self.broadcast_to_tenant({
             "type": "camera_status",
             "data": camera_data
-        })
-        await self.broadcast_to_tenant(message, tenant_id)
+        }, tenant_id)
 
     def get_connection_count(self, tenant_id: str) -> int:
-        return len(self.active_connections.get(tenant_id, []))
+        return len(self.active_connections.get(tenant_id, {}))
+
+    def get_metrics(self, tenant_id: str) -> Dict:
+        connections = list(self.active_connections.get(tenant_id, {}).values())
+        return {
+            "connections": [connection.get_metrics() for connection in connections],
+            "evicted": self.evicted,
+            "broadcast": self.backend.get_metrics()
+        }
+
+def _coalesce_window(websocket: WebSocket) -> float:
+    """Batching window in seconds, from ?batch_ms= or the server default"""
+    try:
+        window_ms = int(websocket.query_params.get("batch_ms", COALESCE_WINDOW_MS))
+    except ValueError:
+        window_ms = COALESCE_WINDOW_MS
+    return min(max(window_ms, 0), MAX_COALESCE_WINDOW_MS) / 1000
+
+def _filter_values(name: str, values) -> Optional[Set[str]]:
+    """Validate one client-supplied filter list; None when it was not given"""
+    if values is None:
+        return None
+    if not isinstance(values, list) or not all(isinstance(value, str) and value for value in values):
+        raise ValueError(f"{name} must be a list of non-empty strings")
+    if len(values) > MAX_SUBSCRIPTION_KEYS:
+        raise ValueError(f"{name} may list at most {MAX_SUBSCRIPTION_KEYS} values")
+    return set(values)
+
+def _merge_filter(current: Optional[Set[str]], added: Optional[Set[str]]) -> Optional[Set[str]]:
+    if added is None:
+        return current
+    # Subscribing to specific values narrows an unfiltered socket to them
+    return added if current is None else current | added
+
+def _remove_filter(current: Optional[Set[str]], removed: Optional[Set[str]]) -> Optional[Set[str]]:
+    if removed is None or current is None:
+        return current
+    return current - removed
+
+def _routing_keys(payload: dict) -> Tuple[Optional[str], Optional[str]]:
+    """(camera_id, event_type) a message is filtered on"""
+    data = payload["data"]
+    if payload["type"] == "camera_status":
+        camera_id = data.get("camera_id") or data.get("camera", {}).get("id")
+        return camera_id, "camera_status"
+    return data.get("camera_id"), data.get("event_type")
 
 # Global connection manager instance
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(create_broadcast_backend(
+    os.getenv("WS_BROADCAST_BACKEND", "memory"), os.getenv("REDIS_URL")
+))
@@ -0,0 +1,71 @@
+import json
+import logging
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Frame = Union[str, bytes]
+
+class JsonEncoding:
+    """Default encoding: one JSON text frame per message"""
+
+    name = "json"
+    binary = False
+
+    def encode(self, payload: dict) -> str:
+        return json.dumps(payload, default=str)
+
+    def batch(self, frames: List[str]) -> str:
+        # Frames are already-encoded JSON objects, so they are spliced in as-is
+        return '{"type": "batch", "data": [' + ", ".join(frames) + "]}"
+
+class MsgPackEncoding:
+    """MessagePack binary frames; roughly 30% smaller and cheaper to encode than JSON"""
+
+    name = "msgpack"
+    binary = True
+
+    def __init__(self):
+        import msgpack
+
+        self.packb = msgpack.packb
+        self.batch_prefix = b"\x82" + msgpack.packb("type") + msgpack.packb("batch") + msgpack.packb("data")
+
+    def encode(self, payload: dict) -> bytes:
+        return self.packb(payload, default=str)
+
+    def batch(self, frames: List[bytes]) -> bytes:
+        # {"type": "batch", "data": [...]} built around the already-packed frames
+        return self.batch_prefix + _array_header(len(frames)) + b"".join(frames)
+
+def _array_header(length: int) -> bytes:
+    if length < 16:
+        return bytes([0x90 | length])
+    if length < 1 << 16:
+        return b"\xdc" + struct.pack(">H", length)
+    return b"\xdd" + struct.pack(">I", length)
+
+def _load_encodings() -> Dict[str, object]:
+    encodings = {"json": JsonEncoding()}
+    try:
+        encodings["msgpack"] = MsgPackEncoding()
+    except ImportError:
+        logger.warning("msgpack not installed, WebSocket clients will only be offered JSON")
+    return encodings
+
+# WebSocket subprotocol -> encoding name; clients opt in via Sec-WebSocket-Protocol
+SUBPROTOCOLS = {
+    "smartsecure.json": "json",
+    "smartsecure.msgpack": "msgpack"
+}
+
+ENCODINGS = _load_encodings()
+
+def negotiate_encoding(requested: Iterable[str]) -> Tuple[Optional[str], object]:
+    """Pick the first requested subprotocol we can serve; plain JSON otherwise"""
+    for subprotocol in requested:
+        encoding = ENCODINGS.get(SUBPROTOCOLS.get(subprotocol))
+        if encoding is not None:
+            return subprotocol, encoding
+    return None, ENCODINGS["json"]